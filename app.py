@@ -1,10 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
+import base64
+import gzip
+import hashlib
+import itertools
+import json
 import os
+import shutil
 import sqlite3
+import tempfile
+import random
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter, OrderedDict
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
+import click
 from flask import (
     Flask,
     render_template,
@@ -14,7 +31,11 @@ from flask import (
     abort,
     Response,
     send_from_directory,
+    stream_template,
 )
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
 import stripe
 
 
@@ -26,24 +47,112 @@ app = Flask(__name__)
 
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-change-me")
 
+# Templates compilés gardés sur disque : un nouveau worker ne recompile pas.
+# Dossier privé (0700) sous instance/ : du bytecode chargé depuis un dossier
+# partagé comme /tmp serait du code exécutable posé par un autre utilisateur.
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR", os.path.join(app.instance_path, "jinja-cache"))
+os.makedirs(JINJA_CACHE_DIR, mode=0o700, exist_ok=True)
+_st = os.stat(JINJA_CACHE_DIR)
+if _st.st_uid != os.getuid() or _st.st_mode & 0o022:
+    raise RuntimeError(
+        f"{JINJA_CACHE_DIR} doit appartenir à l'utilisateur courant "
+        "et n'être inscriptible que par lui"
+    )
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
+# Cartes outils déjà rendues, par worker (voir render_tool_card)
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "5000"))
+STREAM_CHUNK_BYTES = 16 * 1024
+
 DB_PATH = os.getenv("DB_PATH", "annuaire.db")
 
+# Brouillons (is_published = 0) abandonnés avant paiement
+DRAFT_TTL_HOURS = float(os.getenv("DRAFT_TTL_HOURS", "24"))
+DRAFT_REAPER_BATCH = int(os.getenv("DRAFT_REAPER_BATCH", "100"))
+DRAFT_REAPER_INTERVAL = int(os.getenv("DRAFT_REAPER_INTERVAL", "0"))  # secondes, 0 = désactivé
+VACUUM_PAGES = int(os.getenv("VACUUM_PAGES", "200"))
+
+# Sauvegardes à chaud (flask db backup / restore)
+BACKUP_DIR = os.path.abspath(os.getenv("BACKUP_DIR", "backups"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "14"))
+BACKUP_PAGES = int(os.getenv("BACKUP_PAGES", "256"))  # pages copiées par pas
+BACKUP_SLEEP = float(os.getenv("BACKUP_SLEEP", "0.01"))  # pause entre deux pas, en secondes
+BACKUP_INTERVAL = int(os.getenv("BACKUP_INTERVAL", "0"))  # secondes, 0 = désactivé
+BACKUP_MAX_RESTARTS = 3
+BACKUP_PREFIX = "annuaire-"
+BACKUP_SUFFIX = ".db.gz"
+
+# Compteurs vues / clics (write-behind) et score de popularité
+STATS_FLUSH_INTERVAL = int(os.getenv("STATS_FLUSH_INTERVAL", "5"))
+POPULARITY_INTERVAL = int(os.getenv("POPULARITY_INTERVAL", "300"))
+POPULARITY_HALF_LIFE_DAYS = float(os.getenv("POPULARITY_HALF_LIFE_DAYS", "7"))
+POPULARITY_WINDOW_DAYS = 90
+CLICK_WEIGHT = 5.0  # un clic sortant vaut 5 vues
+
+# Vérification des liens sortants (flask tools check-links)
+LINK_CHECK_MAX_AGE_HOURS = float(os.getenv("LINK_CHECK_MAX_AGE_HOURS", "24"))
+LINK_CHECK_CONCURRENCY = int(os.getenv("LINK_CHECK_CONCURRENCY", "20"))
+LINK_CHECK_PER_HOST = int(os.getenv("LINK_CHECK_PER_HOST", "2"))
+LINK_CHECK_TIMEOUT = float(os.getenv("LINK_CHECK_TIMEOUT", "10"))
+LINK_CHECK_WRITE_BATCH = 50
+HTTP_USER_AGENT = "SpectraAIDirectory/1.0 (+https://spectraaidirectory.onrender.com/)"
+
+# Copie locale des logos distants (flask tools mirror-logos)
+LOGO_CACHE_DIR = os.path.abspath(os.getenv("LOGO_CACHE_DIR", "logo_cache"))
+LOGO_MAX_BYTES = int(os.getenv("LOGO_MAX_BYTES", str(2 * 1024 * 1024)))
+LOGO_SIZE = int(os.getenv("LOGO_SIZE", "128"))  # côté max de la vignette, en px
+LOGO_MAX_PIXELS = int(os.getenv("LOGO_MAX_PIXELS", str(4096 * 4096)))  # refus avant décodage
+LOGO_CONCURRENCY = int(os.getenv("LOGO_CONCURRENCY", "8"))
+LOGO_PER_HOST = int(os.getenv("LOGO_PER_HOST", "2"))
+LOGO_TIMEOUT = float(os.getenv("LOGO_TIMEOUT", "10"))
+LOGO_REFRESH_HOURS = float(os.getenv("LOGO_REFRESH_HOURS", "168"))
+LOGO_MIRROR_INTERVAL = int(os.getenv("LOGO_MIRROR_INTERVAL", "0"))  # secondes, 0 = désactivé
+LOGO_WRITE_BATCH = 50
+# Autorise les logos sur des adresses privées / locales (dev uniquement)
+LOGO_ALLOW_PRIVATE = os.getenv("LOGO_ALLOW_PRIVATE", "") == "1"
+LOGO_CONTENT_TYPES = ("image/png", "image/jpeg", "image/gif", "image/webp")
+
+# Détection de doublons (URL canonique + MinHash/LSH)
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4  # 16 bandes x 4 lignes = 64 permutations, seuil LSH ~0.5
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = frozenset({"ref", "fbclid", "gclid", "mc_cid", "mc_eid"})
+
+# Export statique (flask export-static)
+EXPORT_BASE_URL = os.getenv("EXPORT_BASE_URL", "https://spectraaidirectory.onrender.com")
+EXPORT_MANIFEST = ".export-manifest.json"
+EXPORT_ENVIRON_KEY = "spectra.static_export"
+
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
 STRIPE_PRICE_ID = os.getenv("STRIPE_PRICE_ID", "")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 
-if not STRIPE_SECRET_KEY:
-    raise RuntimeError("STRIPE_SECRET_KEY manquant")
-if not STRIPE_PRICE_ID:
-    raise RuntimeError("STRIPE_PRICE_ID manquant")
-
 stripe.api_key = STRIPE_SECRET_KEY
 
 
+def require_stripe() -> None:
+    """
+    Vérifie la config Stripe au moment où on en a besoin (et non à l'import),
+    pour que les commandes `flask db ...` tournent sans clés.
+    """
+    if not STRIPE_SECRET_KEY:
+        raise RuntimeError("STRIPE_SECRET_KEY manquant")
+    if not STRIPE_PRICE_ID:
+        raise RuntimeError("STRIPE_PRICE_ID manquant")
+
+
 # ============================================================
 # BDD SQLITE
 # ============================================================
 
+db_cli = AppGroup("db", help="Schéma et données de la base SQLite.")
+app.cli.add_command(db_cli)
+
+tools_cli = AppGroup("tools", help="Maintenance des fiches outils.")
+app.cli.add_command(tools_cli)
+
+
 @contextmanager
 def get_db():
     conn = sqlite3.connect(DB_PATH)
@@ -70,6 +179,35 @@ def slugify(name: str) -> str:
     return s
 
 
+def canonicalize_url(url: str) -> str:
+    """
+    Forme canonique d'une URL d'outil, pour repérer les doublons exacts.
+    Exemple : "https://www.Chat.openai.com/?utm_source=x" -> "chat.openai.com"
+    (schéma, www., port par défaut, slash final, fragment et paramètres de
+    tracking ignorés ; paramètres restants triés). Lève ValueError si l'URL
+    est malformée (port hors limites, crochets IPv6 non fermés...).
+    """
+    u = url.strip()
+    if "://" not in u:
+        u = "http://" + u
+    parts = urlsplit(u)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS
+        and not k.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    canonical = host + path
+    if query:
+        canonical += "?" + urlencode(query)
+    return canonical
+
+
 def generate_unique_slug(db: sqlite3.Connection, name: str) -> str:
     """
     Génère un slug unique sur la table tools.
@@ -493,13 +631,14 @@ def seed_tools(db: sqlite3.Connection) -> None:
 
     for t in seeds:
         slug = generate_unique_slug(db, t["name"])
-        db.execute(
+        cur = db.execute(
             """
             INSERT INTO tools (
                 name, url, short_description, long_description,
-                logo_url, category, tags, slug, created_at, is_published
+                logo_url, category, tags, slug, created_at, is_published,
+                canonical_url
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)
             """,
             (
                 t["name"],
@@ -511,46 +650,823 @@ def seed_tools(db: sqlite3.Connection) -> None:
                 t["tags"],
                 slug,
                 now,
+                canonicalize_url(t["url"]),
             ),
         )
+        text = minhash_text(t["name"], t["short"], t["long"])
+        index_minhash(db, cur.lastrowid, minhash_signature(text))
 
 
-def init_db() -> None:
+def _migration_1_tools(db: sqlite3.Connection) -> None:
+    """
+    Schéma initial : table tools + colonne slug (bases antérieures)
+    + remplissage des slugs manquants.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tools (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            url TEXT NOT NULL,
+            short_description TEXT,
+            long_description TEXT,
+            logo_url TEXT,
+            category TEXT,
+            tags TEXT,
+            slug TEXT,
+            created_at TEXT NOT NULL,
+            is_published INTEGER NOT NULL DEFAULT 0
+        );
+        """
+    )
+    # Migration légère : s'assurer que la colonne slug existe
+    cols = db.execute("PRAGMA table_info(tools);").fetchall()
+    col_names = [c["name"] for c in cols]
+    if "slug" not in col_names:
+        db.execute("ALTER TABLE tools ADD COLUMN slug TEXT;")
+
+    # Remplir les slugs manquants si nécessaire
+    rows = db.execute(
+        "SELECT id, name FROM tools WHERE slug IS NULL OR slug = '';"
+    ).fetchall()
+    for r in rows:
+        slug = generate_unique_slug(db, r["name"])
+        db.execute("UPDATE tools SET slug = ? WHERE id = ?;", (slug, r["id"]))
+
+
+def _migration_2_drafts(db: sqlite3.Connection) -> None:
+    """
+    Session Stripe liée au brouillon (pour vérifier un paiement avant purge)
+    + index partiel sur les seuls brouillons, utilisé par le reaper.
+    """
+    cols = [c["name"] for c in db.execute("PRAGMA table_info(tools);").fetchall()]
+    if "stripe_session_id" not in cols:
+        db.execute("ALTER TABLE tools ADD COLUMN stripe_session_id TEXT;")
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_tools_drafts_created_at
+        ON tools (created_at)
+        WHERE is_published = 0;
+        """
+    )
+
+
+def _migration_3_stats(db: sqlite3.Connection) -> None:
+    """
+    Compteurs journaliers par outil + score de popularité précalculé.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tool_stats (
+            tool_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            views INTEGER NOT NULL DEFAULT 0,
+            clicks INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (tool_id, day)
+        ) WITHOUT ROWID;
+        """
+    )
+    cols = [c["name"] for c in db.execute("PRAGMA table_info(tools);").fetchall()]
+    if "popularity" not in cols:
+        db.execute("ALTER TABLE tools ADD COLUMN popularity REAL NOT NULL DEFAULT 0;")
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_tools_popularity
+        ON tools (popularity DESC)
+        WHERE is_published = 1;
+        """
+    )
+
+
+def _migration_4_link_health(db: sqlite3.Connection) -> None:
+    """
+    Dernier état connu du lien de chaque outil (statut, redirection, latence)
+    + validateurs HTTP pour les requêtes conditionnelles.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS link_health (
+            tool_id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            status_code INTEGER,
+            final_url TEXT,
+            latency_ms REAL,
+            etag TEXT,
+            last_modified TEXT,
+            is_dead INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            checked_at TEXT NOT NULL
+        );
+        """
+    )
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_link_health_checked_at ON link_health (checked_at);"
+    )
+
+
+def _migration_5_logo_cache(db: sqlite3.Connection) -> None:
+    """
+    Copie locale (vignette normalisée, nommée par son hash) du logo distant
+    de chaque outil, avec les validateurs HTTP de l'origine.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS logo_cache (
+            tool_id INTEGER PRIMARY KEY,
+            source_url TEXT NOT NULL,
+            filename TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            error TEXT,
+            fetched_at TEXT NOT NULL
+        );
+        """
+    )
+
+
+def _migration_6_duplicates(db: sqlite3.Connection) -> None:
+    """
+    URL canonique unique (doublons exacts) + signatures MinHash rangées par
+    bandes LSH (quasi-doublons). Backfill : la plus ancienne fiche publiée
+    garde l'URL canonique, les suivantes sont marquées duplicate_of ; les
+    signatures de toutes les fiches existantes sont calculées.
+    """
+    cols = [c["name"] for c in db.execute("PRAGMA table_info(tools);").fetchall()]
+    if "canonical_url" not in cols:
+        db.execute("ALTER TABLE tools ADD COLUMN canonical_url TEXT;")
+    if "duplicate_of" not in cols:
+        db.execute("ALTER TABLE tools ADD COLUMN duplicate_of INTEGER;")
+
+    owners: dict = {}
+    rows = db.execute(
+        """
+        SELECT id, url, canonical_url FROM tools
+        ORDER BY canonical_url IS NULL, is_published DESC, id;
+        """
+    ).fetchall()
+    for r in rows:
+        try:
+            canonical = r["canonical_url"] or canonicalize_url(r["url"])
+        except ValueError:
+            continue  # URL malformée : pas d'URL canonique, hors index unique
+        if canonical in owners:
+            if owners[canonical] != r["id"]:
+                db.execute(
+                    "UPDATE tools SET canonical_url = NULL, duplicate_of = ? WHERE id = ?;",
+                    (owners[canonical], r["id"]),
+                )
+            continue
+        owners[canonical] = r["id"]
+        db.execute("UPDATE tools SET canonical_url = ? WHERE id = ?;", (canonical, r["id"]))
+
+    db.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_tools_canonical_url ON tools (canonical_url);"
+    )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tool_minhash (
+            tool_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL
+        );
+        """
+    )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tool_lsh (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            tool_id INTEGER NOT NULL,
+            PRIMARY KEY (band, bucket, tool_id)
+        ) WITHOUT ROWID;
+        """
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS idx_tool_lsh_tool_id ON tool_lsh (tool_id);")
+    for r in db.execute(
+        "SELECT id, name, short_description, long_description FROM tools;"
+    ).fetchall():
+        text = minhash_text(r["name"], r["short_description"], r["long_description"])
+        index_minhash(db, r["id"], minhash_signature(text))
+    db.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tools_delete_minhash
+        AFTER DELETE ON tools
+        BEGIN
+            DELETE FROM tool_minhash WHERE tool_id = old.id;
+            DELETE FROM tool_lsh WHERE tool_id = old.id;
+        END;
+        """
+    )
+
+
+def _migration_7_updated_at(db: sqlite3.Connection) -> None:
+    """
+    tools.updated_at change dès que l'affichage d'une fiche change (champs,
+    publication, lien mort, logo copié) : clé des caches de fragments.
+    Tenu à jour par triggers pour couvrir tous les chemins d'écriture.
+    """
+    cols = [c["name"] for c in db.execute("PRAGMA table_info(tools);").fetchall()]
+    if "updated_at" not in cols:
+        db.execute("ALTER TABLE tools ADD COLUMN updated_at TEXT;")
+    db.execute("UPDATE tools SET updated_at = created_at WHERE updated_at IS NULL;")
+
+    now = "strftime('%Y-%m-%dT%H:%M:%f', 'now')"
+    # Un execute() par trigger : executescript() ferait un COMMIT implicite
+    triggers = [
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tools_insert_updated_at
+        AFTER INSERT ON tools
+        WHEN new.updated_at IS NULL
+        BEGIN
+            UPDATE tools SET updated_at = new.created_at WHERE id = new.id;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_tools_touch_updated_at
+        AFTER UPDATE OF name, url, short_description, long_description,
+                        logo_url, category, tags, slug, is_published ON tools
+        BEGIN
+            UPDATE tools SET updated_at = {now} WHERE id = new.id;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_link_health_insert_touch
+        AFTER INSERT ON link_health
+        WHEN new.is_dead = 1
+        BEGIN
+            UPDATE tools SET updated_at = {now} WHERE id = new.tool_id;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_link_health_update_touch
+        AFTER UPDATE OF is_dead ON link_health
+        WHEN old.is_dead != new.is_dead
+        BEGIN
+            UPDATE tools SET updated_at = {now} WHERE id = new.tool_id;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_logo_cache_insert_touch
+        AFTER INSERT ON logo_cache
+        WHEN new.filename IS NOT NULL
+        BEGIN
+            UPDATE tools SET updated_at = {now} WHERE id = new.tool_id;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_logo_cache_update_touch
+        AFTER UPDATE OF filename, source_url ON logo_cache
+        WHEN old.filename IS NOT new.filename OR old.source_url IS NOT new.source_url
+        BEGIN
+            UPDATE tools SET updated_at = {now} WHERE id = new.tool_id;
+        END;
+        """,
+    ]
+    for trigger in triggers:
+        db.execute(trigger)
+
+
+def _migration_8_recanonicalize(db: sqlite3.Connection) -> None:
+    """
+    Seul le paramètre "ref" exact est du tracking (plus "referral", "refresh",
+    ...) : on recalcule les URL canoniques stockées. Sans conflit possible sur
+    l'index unique, l'ancienne forme retirant strictement plus de paramètres.
+    """
+    rows = db.execute(
+        "SELECT id, url, canonical_url FROM tools WHERE canonical_url IS NOT NULL;"
+    ).fetchall()
+    for r in rows:
+        try:
+            canonical = canonicalize_url(r["url"])
+        except ValueError:
+            continue
+        if canonical != r["canonical_url"]:
+            db.execute("UPDATE tools SET canonical_url = ? WHERE id = ?;", (canonical, r["id"]))
+
+
+# Migrations ordonnées : la migration d'index i amène la base à
+# PRAGMA user_version = i + 1. Ne jamais réordonner, seulement ajouter.
+MIGRATIONS = [
+    _migration_1_tools,
+    _migration_2_drafts,
+    _migration_3_stats,
+    _migration_4_link_health,
+    _migration_5_logo_cache,
+    _migration_6_duplicates,
+    _migration_7_updated_at,
+    _migration_8_recanonicalize,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(db: sqlite3.Connection) -> int:
+    return db.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def upgrade_db() -> int:
+    """
+    Applique les migrations manquantes. Idempotent : chaque migration
+    tourne dans une transaction BEGIN IMMEDIATE qui relit user_version,
+    donc deux `flask db upgrade` concurrents ne se marchent pas dessus.
+    Retourne le nombre de migrations appliquées.
+    """
+    applied = 0
     with get_db() as db:
-        db.execute(
-            """
-            CREATE TABLE IF NOT EXISTS tools (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                url TEXT NOT NULL,
-                short_description TEXT,
-                long_description TEXT,
-                logo_url TEXT,
-                category TEXT,
-                tags TEXT,
-                slug TEXT,
-                created_at TEXT NOT NULL,
-                is_published INTEGER NOT NULL DEFAULT 0
-            );
-            """
+        db.isolation_level = None  # transactions gérées à la main
+        while True:
+            db.execute("BEGIN IMMEDIATE;")
+            try:
+                version = get_schema_version(db)
+                if version >= SCHEMA_VERSION:
+                    db.execute("COMMIT;")
+                    return applied
+                MIGRATIONS[version](db)
+                db.execute(f"PRAGMA user_version = {version + 1};")
+                db.execute("COMMIT;")
+            except Exception:
+                db.execute("ROLLBACK;")
+                raise
+            applied += 1
+
+
+def configure_db_file() -> None:
+    """
+    Réglages persistants du fichier, impossibles dans une transaction :
+    - WAL : les lecteurs ne bloquent plus l'écrivain (et inversement)
+    - auto_vacuum INCREMENTAL : permet de rendre les pages libres par petits
+      lots (PRAGMA incremental_vacuum) ; nécessite un VACUUM complet une fois.
+    """
+    with get_db() as db:
+        db.isolation_level = None
+        if db.execute("PRAGMA journal_mode;").fetchone()[0] != "wal":
+            db.execute("PRAGMA journal_mode = WAL;")
+        if db.execute("PRAGMA auto_vacuum;").fetchone()[0] != 2:
+            db.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+            db.execute("VACUUM;")
+
+
+def seed_db() -> int:
+    """
+    Insère les outils initiaux si la table est vide.
+    Idempotent : ne fait rien si des outils existent déjà.
+    """
+    with get_db() as db:
+        row = db.execute("SELECT COUNT(*) AS c FROM tools;").fetchone()
+        if row["c"] > 0:
+            return 0
+        seed_tools(db)
+        return db.execute("SELECT COUNT(*) AS c FROM tools;").fetchone()["c"]
+
+
+def check_schema() -> None:
+    """
+    Seul accès BDD au démarrage d'un worker : une lecture de user_version.
+    Le schéma et le seed sont gérés par `flask db upgrade` / `flask db seed`.
+    """
+    with get_db() as db:
+        version = get_schema_version(db)
+    if version < SCHEMA_VERSION:
+        app.logger.warning(
+            "Schéma BDD en version %s (attendu %s) : lancez `flask db upgrade`",
+            version,
+            SCHEMA_VERSION,
         )
-        # Migration légère : s'assurer que la colonne slug existe
-        cols = db.execute("PRAGMA table_info(tools);").fetchall()
-        col_names = [c["name"] for c in cols]
-        if "slug" not in col_names:
-            db.execute("ALTER TABLE tools ADD COLUMN slug TEXT;")
 
-        # Remplir les slugs manquants si nécessaire
+
+@db_cli.command("upgrade")
+def db_upgrade_command():
+    """Crée / migre le schéma de la base."""
+    applied = upgrade_db()
+    configure_db_file()
+    click.echo(f"{applied} migration(s) appliquée(s), schéma en version {SCHEMA_VERSION}.")
+
+
+@db_cli.command("seed")
+def db_seed_command():
+    """Insère les outils initiaux si la table est vide."""
+    inserted = seed_db()
+    if inserted:
+        click.echo(f"{inserted} outil(s) insérés.")
+    else:
+        click.echo("Table tools déjà remplie, rien à faire.")
+
+
+# ============================================================
+# REQUÊTES OUTILS PUBLIÉS
+# ============================================================
+
+# Logo servi : la copie locale si elle correspond au logo_url actuel,
+# sinon l'URL d'origine (pas encore copiée, ou logo local /public/...)
+TOOL_LOGO_URL = """
+    CASE
+        WHEN lc.filename IS NOT NULL AND lc.source_url = t.logo_url
+        THEN '/logos/' || lc.filename
+        ELSE t.logo_url
+    END
+"""
+
+TOOL_LIST_COLUMNS = f"""
+    t.id, t.name, t.url, t.short_description, {TOOL_LOGO_URL} AS logo_url,
+    t.category, t.tags, t.slug, t.updated_at,
+    COALESCE(lh.is_dead, 0) AS link_dead
+"""
+
+# Jointures communes à toutes les lectures de fiches publiées
+TOOL_FROM = """
+    tools t
+    LEFT JOIN link_health lh ON lh.tool_id = t.id
+    LEFT JOIN logo_cache lc ON lc.tool_id = t.id
+"""
+
+TOOL_DETAIL_COLUMNS = f"""
+    t.id, t.name, t.url, t.short_description, t.long_description,
+    {TOOL_LOGO_URL} AS logo_url,
+    t.category, t.tags, t.slug, t.created_at
+"""
+
+# Betty Bots toujours en tête, puis tri demandé
+TOOL_ORDERS = {
+    "recent": "t.created_at DESC",
+    "popular": "t.popularity DESC, t.created_at DESC",
+}
+DEFAULT_TOOL_ORDER = "recent"
+
+# Champs exposés par l'API JSON (fields=...) -> expression SQL
+API_FIELDS = {
+    "id": "t.id",
+    "slug": "t.slug",
+    "name": "t.name",
+    "url": "t.url",
+    "short_description": "t.short_description",
+    "long_description": "t.long_description",
+    "logo_url": TOOL_LOGO_URL,
+    "category": "t.category",
+    "tags": "t.tags",
+    "created_at": "t.created_at",
+    "updated_at": "t.updated_at",
+    "popularity": "t.popularity",
+    "link_dead": "COALESCE(lh.is_dead, 0)",
+}
+API_DEFAULT_FIELDS = (
+    "id", "slug", "name", "url", "short_description",
+    "logo_url", "category", "tags", "updated_at",
+)
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 200
+
+
+def _published_tools_sql(
+    q: str = "",
+    sort: str = DEFAULT_TOOL_ORDER,
+    limit: int | None = None,
+    columns: str = TOOL_LIST_COLUMNS,
+    category: str = "",
+    tag: str = "",
+    after_id: int | None = None,
+) -> tuple:
+    """
+    Requête commune aux pages de liste et à l'API. after_id active la
+    pagination par clé (ORDER BY id, sans l'épinglage de Betty Bots).
+    """
+    where = ["t.is_published = 1"]
+    params: list = []
+    if category:
+        where.append("t.category = ?")
+        params.append(category)
+    if tag:
+        # tags = "#leads #PME #assistantIA" : on cherche le mot entier
+        where.append("(' ' || t.tags || ' ') LIKE ?")
+        params.append(f"% #{tag.lstrip('#')} %")
+    if q:
+        pattern = f"%{q}%"
+        where.append(
+            """(
+                t.name LIKE ?
+                OR t.url LIKE ?
+                OR t.short_description LIKE ?
+                OR t.long_description LIKE ?
+                OR t.category LIKE ?
+                OR t.tags LIKE ?
+            )"""
+        )
+        params.extend([pattern] * 6)
+
+    if after_id is not None:
+        where.append("t.id > ?")
+        params.append(after_id)
+        order_by = "t.id"
+    else:
+        order = TOOL_ORDERS.get(sort, TOOL_ORDERS[DEFAULT_TOOL_ORDER])
+        order_by = f"CASE WHEN t.name LIKE 'Betty Bots%' THEN 0 ELSE 1 END, {order}"
+
+    sql = f"""
+        SELECT {columns}
+        FROM {TOOL_FROM}
+        WHERE {" AND ".join(where)}
+        ORDER BY {order_by}
+    """
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+def query_published_tools(
+    db: sqlite3.Connection,
+    q: str = "",
+    sort: str = DEFAULT_TOOL_ORDER,
+    limit: int | None = None,
+) -> list:
+    """
+    Outils publiés, filtrés par recherche plein texte (LIKE) et triés.
+    """
+    sql, params = _published_tools_sql(q, sort, limit)
+    return db.execute(sql, params).fetchall()
+
+
+def query_published_tool(
+    db: sqlite3.Connection,
+    slug: str,
+    columns: str = TOOL_DETAIL_COLUMNS,
+) -> sqlite3.Row | None:
+    """Fiche publiée par slug (page outil, API), mêmes jointures que les listes."""
+    return db.execute(
+        f"SELECT {columns} FROM {TOOL_FROM} WHERE t.slug = ? AND t.is_published = 1;",
+        (slug,),
+    ).fetchone()
+
+
+def iter_published_tools(
+    q: str = "",
+    sort: str = DEFAULT_TOOL_ORDER,
+    limit: int | None = None,
+    **filters,
+):
+    """
+    Comme query_published_tools, mais ligne par ligne depuis le curseur :
+    la connexion reste ouverte jusqu'à la fin de l'itération (réponses streamées).
+    filters : columns, category, tag, after_id (voir _published_tools_sql).
+    """
+    sql, params = _published_tools_sql(q, sort, limit, **filters)
+    with get_db() as db:
+        yield from db.execute(sql, params)
+
+
+def peek_rows(rows):
+    """
+    Itérateur vide -> [] (falsy pour `{% if tools %}` dans les templates),
+    sinon un itérateur équivalent.
+    """
+    first = next(rows, None)
+    if first is None:
+        return []
+    return itertools.chain([first], rows)
+
+
+def buffered_stream(chunks, size: int = STREAM_CHUNK_BYTES):
+    """Regroupe les petits morceaux du template en blocs d'environ `size` octets."""
+    buf, length = [], 0
+    for chunk in chunks:
+        buf.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buf)
+            buf, length = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+# (template, id, updated_at) -> Markup
+_fragment_cache: OrderedDict = OrderedDict()
+_fragment_lock = threading.Lock()
+
+
+@app.template_global()
+def render_tool_card(template_name: str, tool) -> Markup:
+    """
+    Rend la carte d'un outil une seule fois par version de la fiche :
+    une page de liste devient une concaténation de fragments en cache.
+    """
+    key = (template_name, tool["id"], tool["updated_at"])
+    with _fragment_lock:
+        html = _fragment_cache.get(key)
+        if html is not None:
+            _fragment_cache.move_to_end(key)
+            return html
+
+    html = Markup(render_template(template_name, tool=tool))
+    with _fragment_lock:
+        _fragment_cache[key] = html
+        if len(_fragment_cache) > FRAGMENT_CACHE_SIZE:
+            _fragment_cache.popitem(last=False)
+    return html
+
+
+def warm_templates() -> None:
+    """
+    Charge tous les templates (depuis le cache de bytecode si possible) ;
+    avec gunicorn --preload les workers héritent de l'environnement déjà prêt.
+    """
+    for name in app.jinja_env.list_templates(extensions=["html"]):
+        app.jinja_env.get_template(name)
+
+
+# ============================================================
+# DOUBLONS (MINHASH / LSH)
+# ============================================================
+
+_MERSENNE_61 = (1 << 61) - 1
+# Graine fixe : les signatures stockées doivent rester comparables
+_rng = random.Random(20240601)
+_MINHASH_PERMS = [
+    (_rng.randrange(1, _MERSENNE_61), _rng.randrange(0, _MERSENNE_61))
+    for _ in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+
+
+def minhash_text(name: str, short: str | None, long: str | None) -> str:
+    """Texte normalisé (minuscules, sans accents ni ponctuation) d'une fiche."""
+    text = " ".join(x for x in (name, short, long) if x)
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch if ch.isalnum() else " " for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.split())
+
+
+def minhash_signature(text: str) -> list:
+    """
+    Signature MinHash sur les 4-grammes de caractères : la proportion de
+    valeurs égales entre deux signatures estime leur similarité de Jaccard.
+    """
+    shingles = {text[i:i + 4] for i in range(max(1, len(text) - 3))}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(sh.encode(), digest_size=8).digest(), "big")
+        for sh in shingles
+    ]
+    return [min((a * x + b) % _MERSENNE_61 for x in hashes) for a, b in _MINHASH_PERMS]
+
+
+def _lsh_buckets(signature: list) -> list:
+    """(bande, bucket) : deux fiches partageant un bucket sont candidates."""
+    buckets = []
+    for band in range(MINHASH_BANDS):
+        chunk = signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]
+        digest = hashlib.blake2b(array("Q", chunk).tobytes(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "big", signed=True)))
+    return buckets
+
+
+def minhash_similarity(a: list, b: list) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def index_minhash(db: sqlite3.Connection, tool_id: int, signature: list) -> None:
+    db.execute(
+        "INSERT OR REPLACE INTO tool_minhash (tool_id, signature) VALUES (?, ?);",
+        (tool_id, array("Q", signature).tobytes()),
+    )
+    db.execute("DELETE FROM tool_lsh WHERE tool_id = ?;", (tool_id,))
+    db.executemany(
+        "INSERT INTO tool_lsh (band, bucket, tool_id) VALUES (?, ?, ?);",
+        [(band, bucket, tool_id) for band, bucket in _lsh_buckets(signature)],
+    )
+
+
+def find_near_duplicate(
+    db: sqlite3.Connection,
+    signature: list,
+    exclude_id: int | None = None,
+    threshold: float = NEAR_DUP_THRESHOLD,
+) -> tuple | None:
+    """
+    Outil publié le plus proche (tool_id, similarité) au-dessus du seuil,
+    en ne comparant qu'aux candidats qui partagent un bucket LSH.
+    """
+    buckets = _lsh_buckets(signature)
+    marks = ",".join("(?, ?)" for _ in buckets)
+    params = [v for pair in buckets for v in pair]
+    rows = db.execute(
+        f"""
+        SELECT DISTINCT m.tool_id, m.signature
+        FROM tool_lsh l
+        JOIN tool_minhash m ON m.tool_id = l.tool_id
+        JOIN tools t ON t.id = l.tool_id
+        WHERE (l.band, l.bucket) IN (VALUES {marks})
+          AND t.is_published = 1
+          AND t.id != ?;
+        """,
+        params + [exclude_id or 0],
+    ).fetchall()
+
+    best = None
+    for r in rows:
+        score = minhash_similarity(signature, array("Q", r["signature"]).tolist())
+        if score >= threshold and (best is None or score > best[1]):
+            best = (r["tool_id"], score)
+    return best
+
+
+def index_missing_minhash(reindex: bool = False) -> int:
+    """Calcule les signatures manquantes (ou toutes) des outils publiés."""
+    with get_db() as db:
         rows = db.execute(
-            "SELECT id, name FROM tools WHERE slug IS NULL OR slug = '';"
+            f"""
+            SELECT t.id, t.name, t.short_description, t.long_description
+            FROM tools t
+            LEFT JOIN tool_minhash m ON m.tool_id = t.id
+            WHERE t.is_published = 1 {"" if reindex else "AND m.tool_id IS NULL"};
+            """
         ).fetchall()
         for r in rows:
-            slug = generate_unique_slug(db, r["name"])
-            db.execute("UPDATE tools SET slug = ? WHERE id = ?;", (slug, r["id"]))
+            text = minhash_text(r["name"], r["short_description"], r["long_description"])
+            index_minhash(db, r["id"], minhash_signature(text))
+    return len(rows)
 
-        row = db.execute("SELECT COUNT(*) AS c FROM tools;").fetchone()
-        if row["c"] == 0:
-            seed_tools(db)
+
+def duplicate_clusters(threshold: float = NEAR_DUP_THRESHOLD) -> list:
+    """
+    Groupes d'outils publiés en doublon : même URL canonique, ou similarité
+    MinHash >= threshold entre candidats LSH. Les paires comparées sont celles
+    qui partagent un bucket (pas de comparaison tous-contre-tous).
+    """
+    parent: dict = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(a, b):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    with get_db() as db:
+        by_url: dict = {}
+        for r in db.execute("SELECT id, url FROM tools WHERE is_published = 1;"):
+            try:
+                by_url.setdefault(canonicalize_url(r["url"]), []).append(r["id"])
+            except ValueError:
+                pass  # URL malformée : seule la similarité MinHash s'applique
+        for ids in by_url.values():
+            for other in ids[1:]:
+                union(ids[0], other)
+
+        signatures = {
+            r["tool_id"]: array("Q", r["signature"]).tolist()
+            for r in db.execute(
+                """
+                SELECT m.tool_id, m.signature
+                FROM tool_minhash m JOIN tools t ON t.id = m.tool_id
+                WHERE t.is_published = 1;
+                """
+            )
+        }
+        pairs = db.execute(
+            """
+            SELECT DISTINCT a.tool_id AS a, b.tool_id AS b
+            FROM tool_lsh a
+            JOIN tool_lsh b
+              ON b.band = a.band AND b.bucket = a.bucket AND b.tool_id > a.tool_id;
+            """
+        ).fetchall()
+
+    for p in pairs:
+        a, b = p["a"], p["b"]
+        if a in signatures and b in signatures:
+            if minhash_similarity(signatures[a], signatures[b]) >= threshold:
+                union(a, b)
+
+    clusters: dict = {}
+    for x in list(parent):
+        clusters.setdefault(find(x), []).append(x)
+    return sorted(sorted(c) for c in clusters.values() if len(c) > 1)
+
+
+@tools_cli.command("dedupe")
+@click.option("--threshold", type=float, default=NEAR_DUP_THRESHOLD, show_default=True)
+@click.option("--reindex", is_flag=True, help="Recalcule toutes les signatures MinHash.")
+@click.option("--mark", is_flag=True, help="Renseigne duplicate_of (fiche la plus ancienne = originale).")
+def dedupe_command(threshold, reindex, mark):
+    """Regroupe les outils publiés en doublon (URL ou contenu proche)."""
+    indexed = index_missing_minhash(reindex)
+    clusters = duplicate_clusters(threshold)
+    with get_db() as db:
+        for cluster in clusters:
+            names = {
+                r["id"]: r["name"]
+                for r in db.execute(
+                    f"SELECT id, name FROM tools WHERE id IN ({','.join('?' * len(cluster))});",
+                    cluster,
+                )
+            }
+            click.echo(" | ".join(f"#{i} {names.get(i, '?')}" for i in cluster))
+            if mark:
+                db.executemany(
+                    "UPDATE tools SET duplicate_of = ? WHERE id = ?;",
+                    [(cluster[0], i) for i in cluster[1:]],
+                )
+    click.echo(f"{indexed} signature(s) calculée(s), {len(clusters)} groupe(s) de doublons.")
 
 
 # ============================================================
@@ -560,17 +1476,7 @@ def init_db() -> None:
 @app.route("/")
 def index():
     with get_db() as db:
-        tools = db.execute(
-            """
-            SELECT id, name, url, short_description, logo_url, category, tags, slug
-            FROM tools
-            WHERE is_published = 1
-            ORDER BY
-                CASE WHEN name LIKE 'Betty Bots%' THEN 0 ELSE 1 END,
-                created_at DESC
-            LIMIT 6;
-            """
-        ).fetchall()
+        tools = query_published_tools(db, limit=6)
 
     return render_template("index.html", tools=tools)
 
@@ -578,65 +1484,211 @@ def index():
 @app.route("/annuaire")
 def annuaire_list():
     q = request.args.get("q", "").strip()
-    with get_db() as db:
-        if q:
-            pattern = f"%{q}%"
-            tools = db.execute(
-                """
-                SELECT id, name, url, short_description, logo_url, category, tags, slug
-                FROM tools
-                WHERE is_published = 1
-                  AND (
-                    name LIKE ?
-                    OR url LIKE ?
-                    OR short_description LIKE ?
-                    OR long_description LIKE ?
-                    OR category LIKE ?
-                    OR tags LIKE ?
-                  )
-                ORDER BY
-                    CASE WHEN name LIKE 'Betty Bots%' THEN 0 ELSE 1 END,
-                    created_at DESC;
-                """,
-                (pattern, pattern, pattern, pattern, pattern, pattern),
-            ).fetchall()
-        else:
-            tools = db.execute(
-                """
-                SELECT id, name, url, short_description, logo_url, category, tags, slug
-                FROM tools
-                WHERE is_published = 1
-                ORDER BY
-                    CASE WHEN name LIKE 'Betty Bots%' THEN 0 ELSE 1 END,
-                    created_at DESC;
-                """
-            ).fetchall()
-
-    return render_template("annuaire_list.html", tools=tools, query=q)
+    sort = request.args.get("sort", DEFAULT_TOOL_ORDER)
+    if sort not in TOOL_ORDERS:
+        sort = DEFAULT_TOOL_ORDER
+    # Streamé depuis le curseur : le premier octet part avant la fin de la requête
+    tools = peek_rows(iter_published_tools(q=q, sort=sort))
+    return Response(
+        buffered_stream(stream_template("annuaire_list.html", tools=tools, query=q, sort=sort)),
+        mimetype="text/html",
+    )
 
 
 @app.route("/tool/<slug>")
 def tool_detail(slug: str):
+    with get_db() as db:
+        tool = query_published_tool(db, slug)
+
+    if not tool:
+        abort(404)
+
+    if not is_static_export():
+        record_hit(tool["id"], "views")
+    return render_template("tool_detail.html", tool=tool)
+
+
+@app.route("/go/<slug>")
+def go_tool(slug: str):
+    """
+    Lien sortant vers le site de l'outil : compte le clic puis redirige.
+    """
     with get_db() as db:
         tool = db.execute(
-            """
-            SELECT *
-            FROM tools
-            WHERE slug = ? AND is_published = 1;
-            """,
+            "SELECT id, url FROM tools WHERE slug = ? AND is_published = 1;",
             (slug,),
         ).fetchone()
 
     if not tool:
         abort(404)
 
-    return render_template("tool_detail.html", tool=tool)
+    record_hit(tool["id"], "clicks")
+    return redirect(tool["url"], code=302)
+
+
+# ============================================================
+# API JSON (LECTURE SEULE)
+# ============================================================
+
+def api_error(message: str, status: int) -> Response:
+    return Response(json.dumps({"error": message}), status=status, mimetype="application/json")
+
+
+def _api_fields() -> list:
+    """Champs demandés via ?fields=a,b (id toujours inclus, pour le curseur)."""
+    raw = request.args.get("fields", "")
+    fields = [f.strip() for f in raw.split(",") if f.strip()] or list(API_DEFAULT_FIELDS)
+    unknown = [f for f in fields if f not in API_FIELDS]
+    if unknown:
+        raise ValueError(f"champ(s) inconnu(s) : {', '.join(unknown)}")
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return fields
+
+
+def _api_columns(fields: list) -> str:
+    return ", ".join(f"{API_FIELDS[f]} AS {f}" for f in fields)
+
+
+def encode_cursor(tool_id: int) -> str:
+    return base64.urlsafe_b64encode(str(tool_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except ValueError:
+        raise ValueError("cursor invalide") from None
+
+
+def _published_version(fields: list) -> tuple:
+    """
+    Change dès qu'un outil publié apparaît, disparaît ou est modifié
+    (updated_at est tenu par triggers) : base des ETags de l'API.
+    recompute_popularity ne touche pas updated_at : si le champ popularity
+    est demandé, la somme des scores entre aussi dans la version.
+    """
+    popularity = ", TOTAL(popularity)" if "popularity" in fields else ""
+    with get_db() as db:
+        row = db.execute(
+            f"SELECT COUNT(*), MAX(updated_at){popularity} FROM tools WHERE is_published = 1;"
+        ).fetchone()
+    return tuple(row)
+
+
+def _not_modified(etag: str) -> Response | None:
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+    return None
+
+
+@app.route("/api/tools")
+def api_tools():
+    """
+    Liste paginée par curseur : ?cursor=&limit=&fields=&category=&tag=&q=
+    Le JSON est écrit ligne par ligne depuis le curseur SQLite.
+    """
+    try:
+        fields = _api_fields()
+        try:
+            limit = min(int(request.args.get("limit", API_DEFAULT_LIMIT)), API_MAX_LIMIT)
+        except ValueError:
+            raise ValueError("limit invalide") from None
+        if limit < 1:
+            raise ValueError("limit doit être >= 1")
+        cursor = request.args.get("cursor", "")
+        after_id = decode_cursor(cursor) if cursor else 0
+    except ValueError as e:
+        return api_error(str(e), 400)
+
+    filters = {
+        "q": request.args.get("q", "").strip(),
+        "category": request.args.get("category", "").strip(),
+        "tag": request.args.get("tag", "").strip(),
+    }
+    etag = hashlib.sha1(
+        repr((_published_version(fields), fields, limit, after_id, filters)).encode()
+    ).hexdigest()
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    # limit + 1 : la ligne en trop indique qu'il y a une page suivante
+    rows = iter_published_tools(
+        limit=limit + 1,
+        columns=_api_columns(fields),
+        after_id=after_id,
+        **filters,
+    )
+
+    def generate():
+        yield '{"data":['
+        last_id = None
+        for i, row in enumerate(rows):
+            if i == limit:
+                rows.close()
+                yield '],"next_cursor":' + json.dumps(encode_cursor(last_id)) + "}"
+                return
+            yield ("," if i else "") + json.dumps(dict(zip(fields, row)), ensure_ascii=False)
+            last_id = row["id"]
+        yield '],"next_cursor":null}'
+
+    resp = Response(buffered_stream(generate()), mimetype="application/json")
+    resp.set_etag(etag)
+    return resp
+
+
+@app.route("/api/tools/<slug>")
+def api_tool_detail(slug: str):
+    try:
+        fields = _api_fields()
+    except ValueError as e:
+        return api_error(str(e), 400)
+
+    with get_db() as db:
+        row = query_published_tool(db, slug, f"{_api_columns(fields)}, t.updated_at AS _version")
+
+    if not row:
+        return api_error("outil introuvable", 404)
+
+    # popularity change sans toucher updated_at : sa valeur entre dans l'ETag
+    popularity = row["popularity"] if "popularity" in fields else None
+    etag = hashlib.sha1(repr((row["_version"], popularity, fields)).encode()).hexdigest()
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    # zip s'arrête avant _version
+    resp = Response(
+        json.dumps(dict(zip(fields, row)), ensure_ascii=False),
+        mimetype="application/json",
+    )
+    resp.set_etag(etag)
+    return resp
 
 
 # ============================================================
 # AJOUT + STRIPE (FORMULAIRE + CHECKOUT)
 # ============================================================
 
+def _draft_is_abandoned(session_id: str | None) -> bool:
+    """
+    Un brouillon existant ne peut être repris par une nouvelle soumission que
+    si sa session Stripe est expirée. Sans session (création en cours) ou si
+    Stripe ne répond pas, on considère qu'il appartient encore à quelqu'un.
+    """
+    if not session_id:
+        return False
+    try:
+        return stripe.checkout.Session.retrieve(session_id).get("status") == "expired"
+    except Exception as e:
+        app.logger.warning("Session %s illisible (%s)", session_id, e)
+        return False
+
+
 @app.route("/ajouter", methods=["GET", "POST"])
 def ajouter_tool():
     if request.method == "GET":
@@ -653,32 +1705,107 @@ def ajouter_tool():
     if not name or not url_site:
         return "Nom + URL obligatoires", 400
 
+    require_stripe()
+
+    try:
+        canonical = canonicalize_url(url_site)
+    except ValueError:
+        return "URL invalide", 400
     created_at = datetime.utcnow().isoformat()
+    signature = minhash_signature(minhash_text(name, short_desc, long_desc))
 
-    # On insère l'outil en brouillon (is_published = 0) avec slug unique
     with get_db() as db:
-        slug = generate_unique_slug(db, name)
-        cur = db.execute(
+        # Doublon exact : recherche par index unique, avant toute session Stripe
+        existing = db.execute(
             """
-            INSERT INTO tools (
-                name, url, short_description, long_description,
-                logo_url, category, tags, slug, created_at, is_published
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+            SELECT id, name, slug, is_published, stripe_session_id
+            FROM tools WHERE canonical_url = ?
             """,
-            (
-                name,
-                url_site,
-                short_desc,
-                long_desc,
-                logo_url,
-                category,
-                tags,
-                slug,
-                created_at,
-            ),
+            (canonical,),
+        ).fetchone()
+    if existing and existing["is_published"]:
+        return (
+            "Cet outil est déjà référencé : "
+            + url_for("tool_detail", slug=existing["slug"], _external=True),
+            409,
+        )
+    if existing and not _draft_is_abandoned(existing["stripe_session_id"]):
+        # Quelqu'un est peut-être en train de payer pour ce brouillon
+        return "Cet outil est déjà en cours de référencement", 409
+
+    with get_db() as db:
+        near = find_near_duplicate(db, signature, exclude_id=existing and existing["id"])
+        duplicate_of = near[0] if near else None
+
+        if existing:
+            # Brouillon abandonné (session expirée) : on le reprend. La
+            # condition sur l'ancienne session rend la reprise atomique :
+            # une seule soumission concurrente gagne.
+            tool_id = existing["id"]
+            slug = existing["slug"] if existing["name"] == name else generate_unique_slug(db, name)
+            cur = db.execute(
+                """
+                UPDATE tools SET
+                    name = ?, url = ?, short_description = ?, long_description = ?,
+                    logo_url = ?, category = ?, tags = ?, slug = ?, created_at = ?,
+                    duplicate_of = ?, stripe_session_id = NULL
+                WHERE id = ? AND is_published = 0 AND stripe_session_id = ?
+                """,
+                (
+                    name,
+                    url_site,
+                    short_desc,
+                    long_desc,
+                    logo_url,
+                    category,
+                    tags,
+                    slug,
+                    created_at,
+                    duplicate_of,
+                    tool_id,
+                    existing["stripe_session_id"],
+                ),
+            )
+            if cur.rowcount == 0:
+                return "Cet outil est déjà en cours de référencement", 409
+        else:
+            # On insère l'outil en brouillon (is_published = 0) avec slug unique
+            slug = generate_unique_slug(db, name)
+            try:
+                cur = db.execute(
+                    """
+                    INSERT INTO tools (
+                        name, url, short_description, long_description,
+                        logo_url, category, tags, slug, created_at, is_published,
+                        canonical_url, duplicate_of
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)
+                    """,
+                    (
+                        name,
+                        url_site,
+                        short_desc,
+                        long_desc,
+                        logo_url,
+                        category,
+                        tags,
+                        slug,
+                        created_at,
+                        canonical,
+                        duplicate_of,
+                    ),
+                )
+            except sqlite3.IntegrityError:
+                # Soumission concurrente de la même URL
+                return "Cet outil est déjà en cours de référencement", 409
+            tool_id = cur.lastrowid
+
+        index_minhash(db, tool_id, signature)
+
+    if duplicate_of:
+        app.logger.info(
+            "Outil %s proche de l'outil %s (similarité %.2f)", tool_id, near[0], near[1]
         )
-        tool_id = cur.lastrowid
 
     try:
         # Checkout Stripe avec metadata pour le webhook
@@ -705,11 +1832,22 @@ def ajouter_tool():
             },
         )
     except Exception as e:
-        # En cas d'erreur Stripe, on supprime le brouillon
+        # En cas d'erreur Stripe, on supprime le brouillon, seulement tant
+        # qu'il n'a pas de session : c'est alors forcément le nôtre
         with get_db() as db:
-            db.execute("DELETE FROM tools WHERE id = ?", (tool_id,))
+            db.execute(
+                "DELETE FROM tools WHERE id = ? AND is_published = 0 AND stripe_session_id IS NULL",
+                (tool_id,),
+            )
         return f"Erreur Stripe : {e}", 500
 
+    # Gardé pour que le reaper puisse vérifier le paiement avant de purger
+    with get_db() as db:
+        db.execute(
+            "UPDATE tools SET stripe_session_id = ? WHERE id = ?",
+            (session.id, tool_id),
+        )
+
     return redirect(session.url, code=303)
 
 
@@ -731,6 +1869,7 @@ def checkout_success():
     if not session_id or not tool_id:
         return "Paramètres manquants", 400
 
+    require_stripe()
     s = stripe.checkout.Session.retrieve(session_id)
     if s.get("payment_status") != "paid":
         return "Paiement non validé", 400
@@ -797,6 +1936,1017 @@ def stripe_webhook():
     return "ok", 200
 
 
+# ============================================================
+# TÂCHES DE FOND (PAR WORKER)
+# ============================================================
+
+# name -> (intervalle en secondes, fonction)
+BACKGROUND_JOBS: dict = {}
+_background_pid = None
+_background_lock = threading.Lock()
+
+
+def background_job(name: str, interval: int):
+    """
+    Enregistre une tâche périodique lancée dans un thread daemon de chaque
+    worker. Intervalle <= 0 : tâche désactivée.
+    """
+    def decorator(func):
+        if interval > 0:
+            BACKGROUND_JOBS[name] = (interval, func)
+        return func
+    return decorator
+
+
+def _run_background_job(name: str, interval: int, func) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            func()
+        except Exception:
+            app.logger.exception("Tâche de fond %s en échec", name)
+
+
+def run_once_across_workers(lock_path: str, interval: float, func) -> bool:
+    """
+    Lance func() si aucun autre worker ne l'a fait depuis `interval` secondes :
+    verrou de fichier non bloquant, l'heure du dernier passage étant notée
+    dans le fichier verrou. Retourne True si func() a tourné ici.
+    """
+    import fcntl
+
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, "a+") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        lock.seek(0)
+        try:
+            last = float(lock.read() or 0)
+        except ValueError:
+            last = 0.0
+        if time.time() - last < interval * 0.9:
+            return False
+        func()
+        lock.truncate(0)
+        lock.write(str(time.time()))
+    return True
+
+
+@app.before_request
+def start_background_jobs():
+    """
+    Démarre les threads au premier hit du worker (et non à l'import) :
+    avec gunicorn --preload, un thread lancé dans le master ne survit pas au fork.
+    """
+    global _background_pid
+    if _background_pid == os.getpid() or not BACKGROUND_JOBS or is_static_export():
+        return
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        for name, (interval, func) in BACKGROUND_JOBS.items():
+            threading.Thread(
+                target=_run_background_job,
+                args=(name, interval, func),
+                name=f"job-{name}",
+                daemon=True,
+            ).start()
+        _background_pid = os.getpid()
+
+
+# ============================================================
+# PURGE DES BROUILLONS ABANDONNÉS
+# ============================================================
+
+def _draft_session_state(session_id: str) -> str:
+    """
+    État de la session Stripe d'un brouillon, du point de vue du reaper :
+    - "paid"    : payée (webhook manqué) -> on publie
+    - "expired" : expirée, plus aucun paiement possible -> on supprime
+    - "keep"    : encore ouverte, paiement en attente, ou Stripe non configuré
+                  / injoignable -> dans le doute on garde
+
+    Une session encore ouverte est expirée d'abord (Session.expire) : ainsi
+    un utilisateur toujours sur la page de paiement ne peut plus payer pour
+    une fiche supprimée. Si l'expiration échoue (il vient de payer), on garde.
+    """
+    if not STRIPE_SECRET_KEY:
+        return "keep"
+    try:
+        s = stripe.checkout.Session.retrieve(session_id)
+        if s.get("payment_status") == "paid":
+            return "paid"
+        if s.get("status") == "open":
+            s = stripe.checkout.Session.expire(session_id)
+    except Exception as e:
+        app.logger.warning("Reaper : session %s gardée (%s)", session_id, e)
+        return "keep"
+    return "expired" if s.get("status") == "expired" else "keep"
+
+
+def incremental_vacuum(max_pages: int = VACUUM_PAGES) -> int:
+    """Rend au plus max_pages pages libres au système. Retourne le nombre libéré."""
+    with get_db() as db:
+        before = db.execute("PRAGMA freelist_count;").fetchone()[0]
+        # executescript fait avancer le pragma jusqu'au bout (un execute()
+        # classique ne libère qu'une page par pas)
+        db.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        after = db.execute("PRAGMA freelist_count;").fetchone()[0]
+    return before - after
+
+
+def reap_drafts(
+    ttl_hours: float = DRAFT_TTL_HOURS,
+    batch_size: int = DRAFT_REAPER_BATCH,
+    vacuum_pages: int = VACUUM_PAGES,
+    purge_orphans: bool = False,
+) -> dict:
+    """
+    Supprime les brouillons plus vieux que ttl_hours, par lots de batch_size.
+
+    Chaque lot est lu hors transaction (index partiel idx_tools_drafts_created_at)
+    puis supprimé dans sa propre transaction courte : le verrou d'écriture
+    n'est jamais tenu pendant un appel Stripe. Seuls les brouillons sans
+    session expirée sont supprimés ; une session payée publie le brouillon
+    (webhook manqué), voir _draft_session_state.
+
+    Un brouillon sans stripe_session_id (antérieur à la migration 2, ou
+    process tué entre la création de la session et son enregistrement) a
+    peut-être été payé sans qu'on puisse le vérifier : il est gardé et compté
+    dans "orphaned", sauf purge_orphans explicite.
+    """
+    cutoff = (datetime.utcnow() - timedelta(hours=ttl_hours)).isoformat()
+    counts = {"deleted": 0, "published": 0, "kept": 0, "orphaned": 0, "vacuumed_pages": 0}
+    last = ("", 0)
+
+    while True:
+        with get_db() as db:
+            rows = db.execute(
+                """
+                SELECT id, created_at, stripe_session_id
+                FROM tools
+                WHERE is_published = 0
+                  AND created_at < ?
+                  AND (created_at, id) > (?, ?)
+                ORDER BY created_at, id
+                LIMIT ?;
+                """,
+                (cutoff, last[0], last[1], batch_size),
+            ).fetchall()
+        if not rows:
+            break
+        last = (rows[-1]["created_at"], rows[-1]["id"])
+
+        # (id, session lue) : la session sert de garde à l'écriture, une
+        # nouvelle soumission ayant pu reprendre le brouillon entre-temps
+        to_delete, to_publish = [], []
+        for r in rows:
+            key = (r["id"], r["stripe_session_id"])
+            if not r["stripe_session_id"]:
+                if purge_orphans:
+                    to_delete.append(key)
+                else:
+                    counts["orphaned"] += 1
+                    app.logger.warning("Reaper : brouillon %s sans session Stripe, gardé", r["id"])
+                continue
+            state = _draft_session_state(r["stripe_session_id"])
+            if state == "paid":
+                to_publish.append(key)
+            elif state == "expired":
+                to_delete.append(key)
+            else:
+                counts["kept"] += 1
+
+        with get_db() as db:
+            cur = db.executemany(
+                """
+                UPDATE tools SET is_published = 1
+                WHERE id = ? AND is_published = 0 AND stripe_session_id IS ?
+                """,
+                to_publish,
+            )
+            counts["published"] += cur.rowcount
+            cur = db.executemany(
+                """
+                DELETE FROM tools
+                WHERE id = ? AND is_published = 0 AND stripe_session_id IS ?
+                """,
+                to_delete,
+            )
+            counts["deleted"] += cur.rowcount
+
+        if len(rows) < batch_size:
+            break
+
+    if vacuum_pages > 0:
+        counts["vacuumed_pages"] = incremental_vacuum(vacuum_pages)
+
+    return counts
+
+
+@background_job("reap-drafts", DRAFT_REAPER_INTERVAL)
+def reap_drafts_job() -> None:
+    counts = reap_drafts()
+    app.logger.info(
+        "Reaper brouillons : %(deleted)s supprimé(s), %(published)s publié(s), "
+        "%(kept)s gardé(s), %(orphaned)s sans session, %(vacuumed_pages)s page(s) libérée(s)",
+        counts,
+    )
+
+
+@tools_cli.command("reap-drafts")
+@click.option("--ttl-hours", type=float, default=DRAFT_TTL_HOURS, show_default=True)
+@click.option("--batch-size", type=int, default=DRAFT_REAPER_BATCH, show_default=True)
+@click.option("--vacuum-pages", type=int, default=VACUUM_PAGES, show_default=True)
+@click.option("--purge-orphans", is_flag=True,
+              help="Supprime aussi les brouillons sans session Stripe (paiement invérifiable).")
+def reap_drafts_command(ttl_hours, batch_size, vacuum_pages, purge_orphans):
+    """Supprime les brouillons non payés plus vieux que le TTL."""
+    counts = reap_drafts(ttl_hours, batch_size, vacuum_pages, purge_orphans)
+    click.echo(
+        "{deleted} supprimé(s), {published} publié(s) (paiement trouvé), "
+        "{kept} gardé(s) (session Stripe ouverte ou injoignable), "
+        "{orphaned} gardé(s) sans session Stripe, "
+        "{vacuumed_pages} page(s) libérée(s).".format(**counts)
+    )
+
+
+# ============================================================
+# COMPTEURS VUES / CLICS ET POPULARITÉ
+# ============================================================
+
+# (tool_id, jour, "views" | "clicks") -> compteur, propre à chaque worker.
+# Vidé en base toutes les STATS_FLUSH_INTERVAL secondes : une requête ne
+# fait jamais d'écriture SQLite, et perdre une fenêtre (crash) est acceptable.
+_stats_buffer: Counter = Counter()
+_stats_lock = threading.Lock()
+
+
+def record_hit(tool_id: int, kind: str) -> None:
+    day = datetime.utcnow().date().isoformat()
+    with _stats_lock:
+        _stats_buffer[(tool_id, day, kind)] += 1
+
+
+def flush_stats() -> int:
+    """
+    Écrit le buffer en un seul upsert groupé. Retourne le nombre de lignes.
+    """
+    global _stats_buffer
+    with _stats_lock:
+        if not _stats_buffer:
+            return 0
+        buffer, _stats_buffer = _stats_buffer, Counter()
+
+    rows: dict = {}
+    for (tool_id, day, kind), n in buffer.items():
+        views, clicks = rows.get((tool_id, day), (0, 0))
+        if kind == "views":
+            views += n
+        else:
+            clicks += n
+        rows[(tool_id, day)] = (views, clicks)
+
+    with get_db() as db:
+        db.executemany(
+            """
+            INSERT INTO tool_stats (tool_id, day, views, clicks)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (tool_id, day) DO UPDATE SET
+                views = views + excluded.views,
+                clicks = clicks + excluded.clicks;
+            """,
+            [(t, d, v, c) for (t, d), (v, c) in rows.items()],
+        )
+    return len(rows)
+
+
+def recompute_popularity() -> int:
+    """
+    Score = somme sur les POPULARITY_WINDOW_DAYS derniers jours de
+    (vues + CLICK_WEIGHT * clics), avec une demi-vie de POPULARITY_HALF_LIFE_DAYS.
+    Stocké dans tools.popularity pour que le tri "popular" reste un simple ORDER BY.
+    Seules les lignes dont le score change sont réécrites ; renvoie leur nombre.
+    Les compteurs sortis de la fenêtre ne comptent plus : ils sont supprimés.
+    """
+    today = datetime.utcnow().date()
+    since = (today - timedelta(days=POPULARITY_WINDOW_DAYS)).isoformat()
+    scores: dict = {}
+
+    with get_db() as db:
+        for r in db.execute(
+            "SELECT tool_id, day, views, clicks FROM tool_stats WHERE day >= ?;",
+            (since,),
+        ):
+            age = (today - datetime.fromisoformat(r["day"]).date()).days
+            decay = 0.5 ** (age / POPULARITY_HALF_LIFE_DAYS)
+            score = (r["views"] + CLICK_WEIGHT * r["clicks"]) * decay
+            scores[r["tool_id"]] = scores.get(r["tool_id"], 0.0) + score
+
+        changed = [
+            (scores.get(r["id"], 0.0), r["id"])
+            for r in db.execute("SELECT id, popularity FROM tools;")
+            if abs(scores.get(r["id"], 0.0) - (r["popularity"] or 0.0)) > 1e-9
+        ]
+        db.executemany("UPDATE tools SET popularity = ? WHERE id = ?;", changed)
+        db.execute("DELETE FROM tool_stats WHERE day < ?;", (since,))
+    return len(changed)
+
+
+@background_job("flush-stats", STATS_FLUSH_INTERVAL)
+def flush_stats_job() -> None:
+    flush_stats()
+
+
+@background_job("popularity", POPULARITY_INTERVAL)
+def popularity_job() -> None:
+    # Un seul recalcul par intervalle pour tous les workers
+    run_once_across_workers(DB_PATH + ".popularity.lock", POPULARITY_INTERVAL, recompute_popularity)
+
+
+# Dernière fenêtre vidée à l'arrêt propre du worker
+atexit.register(flush_stats)
+
+
+@tools_cli.command("popularity")
+def popularity_command():
+    """Recalcule le score de popularité de tous les outils."""
+    n = recompute_popularity()
+    click.echo(f"Popularité recalculée ({n} score(s) modifié(s)).")
+
+
+# ============================================================
+# SAUVEGARDES À CHAUD
+# ============================================================
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class _BackupRestarted(Exception):
+    pass
+
+
+def list_backups(dest_dir: str = BACKUP_DIR) -> list:
+    """Sauvegardes de dest_dir, de la plus ancienne à la plus récente."""
+    if not os.path.isdir(dest_dir):
+        return []
+    names = sorted(
+        n for n in os.listdir(dest_dir)
+        if n.startswith(BACKUP_PREFIX) and n.endswith(BACKUP_SUFFIX)
+    )
+    return [os.path.join(dest_dir, n) for n in names]
+
+
+def backup_db(
+    dest_dir: str = BACKUP_DIR,
+    pages: int = BACKUP_PAGES,
+    sleep: float = BACKUP_SLEEP,
+    keep: int = BACKUP_KEEP,
+) -> dict:
+    """
+    Copie cohérente de la base pendant que les workers écrivent :
+    sqlite3 backup par pas de `pages` pages avec une pause entre chaque pas,
+    pour ne jamais bloquer les écrivains longtemps. Chaque écriture d'une
+    autre connexion fait repartir la copie de zéro : après
+    BACKUP_MAX_RESTARTS reprises, on finit en une seule passe, qui en WAL
+    (configure_db_file) ne prend qu'un instantané en lecture et ne bloque
+    pas non plus les écrivains. La copie est ensuite compressée (gzip),
+    accompagnée d'un fichier .sha256, et seules les `keep` plus récentes
+    sont conservées.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    final = os.path.join(dest_dir, f"{BACKUP_PREFIX}{stamp}{BACKUP_SUFFIX}")
+    raw_tmp = final + ".raw.tmp"
+    gz_tmp = final + ".tmp"
+    steps = restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal steps, restarts, last_remaining
+        steps += 1
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > BACKUP_MAX_RESTARTS:
+                raise _BackupRestarted()
+        last_remaining = remaining
+        if remaining and sleep > 0:
+            time.sleep(sleep)
+
+    t0 = time.perf_counter()
+    try:
+        src = sqlite3.connect(DB_PATH)
+        dst = sqlite3.connect(raw_tmp)
+        try:
+            try:
+                src.backup(dst, pages=pages, progress=progress)
+            except _BackupRestarted:
+                src.backup(dst, pages=-1)
+        finally:
+            dst.close()
+            src.close()
+        copied_in = time.perf_counter() - t0
+
+        with open(raw_tmp, "rb") as f_in, gzip.open(gz_tmp, "wb", compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        raw_size = os.path.getsize(raw_tmp)
+        os.replace(gz_tmp, final)
+    finally:
+        # Copie brute (et gzip inachevé si échec) : jamais laissés dans dest_dir
+        for tmp in (raw_tmp, gz_tmp):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    checksum = _sha256_file(final)
+    with open(final + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{checksum}  {os.path.basename(final)}\n")
+
+    removed = 0
+    for old in list_backups(dest_dir)[:-keep] if keep > 0 else []:
+        os.remove(old)
+        if os.path.exists(old + ".sha256"):
+            os.remove(old + ".sha256")
+        removed += 1
+
+    return {
+        "path": final,
+        "sha256": checksum,
+        "steps": steps,
+        "restarts": restarts,
+        "db_bytes": raw_size,
+        "gz_bytes": os.path.getsize(final),
+        "copy_seconds": copied_in,
+        "total_seconds": time.perf_counter() - t0,
+        "rotated": removed,
+    }
+
+
+def verify_backup(path: str, dest: str) -> int:
+    """
+    Vérifie le .sha256, décompresse vers dest et contrôle l'intégrité SQLite.
+    Retourne le user_version de la sauvegarde. Lève ValueError si invalide.
+    """
+    sidecar = path + ".sha256"
+    if not os.path.exists(sidecar):
+        raise ValueError(f"{sidecar} introuvable")
+    with open(sidecar, encoding="utf-8") as f:
+        expected = f.read().split()[0]
+    if _sha256_file(path) != expected:
+        raise ValueError("somme de contrôle invalide")
+
+    with gzip.open(path, "rb") as f_in, open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+
+    conn = sqlite3.connect(dest)
+    try:
+        result = conn.execute("PRAGMA integrity_check;").fetchone()[0]
+        version = conn.execute("PRAGMA user_version;").fetchone()[0]
+    finally:
+        conn.close()
+    if result != "ok":
+        raise ValueError(f"intégrité SQLite : {result}")
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"schéma {version} plus récent que le code ({SCHEMA_VERSION})")
+    return version
+
+
+def restore_db(path: str) -> int:
+    """
+    Remplace le contenu de DB_PATH par une sauvegarde vérifiée. Passe par
+    l'API backup de SQLite (et non une copie de fichier) : les connexions
+    ouvertes voient le changement de façon atomique. Retourne le user_version.
+    """
+    fd, tmp = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(os.path.abspath(DB_PATH)))
+    os.close(fd)
+    try:
+        version = verify_backup(path, tmp)
+        src = sqlite3.connect(tmp)
+        dst = sqlite3.connect(DB_PATH)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+    finally:
+        os.remove(tmp)
+    return version
+
+
+@background_job("backup", BACKUP_INTERVAL)
+def backup_job() -> None:
+    # Une seule sauvegarde par intervalle pour tous les workers
+    def run():
+        info = backup_db()
+        app.logger.info("Sauvegarde %s (%.1fs)", info["path"], info["total_seconds"])
+
+    run_once_across_workers(os.path.join(BACKUP_DIR, ".lock"), BACKUP_INTERVAL, run)
+
+
+@db_cli.command("backup")
+@click.option("--dest", default=BACKUP_DIR, show_default=True, type=click.Path(file_okay=False))
+@click.option("--keep", type=int, default=BACKUP_KEEP, show_default=True)
+@click.option("--pages", type=int, default=BACKUP_PAGES, show_default=True,
+              help="Pages copiées par pas.")
+@click.option("--sleep", type=float, default=BACKUP_SLEEP, show_default=True,
+              help="Pause entre deux pas (s).")
+def db_backup_command(dest, keep, pages, sleep):
+    """Sauvegarde à chaud, compressée et signée (sha256), avec rotation."""
+    info = backup_db(dest, pages, sleep, keep)
+    click.echo(
+        f"{info['path']} : {info['db_bytes'] / 1e6:.1f} Mo -> {info['gz_bytes'] / 1e6:.1f} Mo, "
+        f"{info['steps']} pas ({info['restarts']} reprise(s)), {info['total_seconds']:.1f}s, "
+        f"{info['rotated']} ancienne(s) supprimée(s)."
+    )
+
+
+@db_cli.command("restore")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--check-only", is_flag=True, help="Vérifie la sauvegarde sans restaurer.")
+@click.option("--yes", is_flag=True, help="Ne pas demander de confirmation.")
+def db_restore_command(path, check_only, yes):
+    """Restaure DB_PATH depuis une sauvegarde après vérification."""
+    if check_only:
+        fd, tmp = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            version = verify_backup(path, tmp)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        finally:
+            os.remove(tmp)
+        click.echo(f"Sauvegarde valide (schéma {version}).")
+        return
+
+    if not yes:
+        click.confirm(f"Remplacer {DB_PATH} par {path} ?", abort=True)
+    try:
+        version = restore_db(path)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Base restaurée (schéma {version}).")
+    if version < SCHEMA_VERSION:
+        click.echo("Schéma ancien : lancez `flask db upgrade`.")
+
+
+# ============================================================
+# SANTÉ DES LIENS SORTANTS
+# ============================================================
+
+def is_dead_status(status_code: int | None, error: str | None) -> bool:
+    """
+    Mort = injoignable, 404/410 ou erreur serveur. 401/403/429 signalent
+    souvent un anti-bot devant un site vivant : on ne les compte pas.
+    """
+    if error:
+        return True
+    return status_code in (404, 410) or status_code >= 500
+
+
+async def _probe_link(client, row: dict) -> dict:
+    """
+    HEAD puis GET si le serveur refuse HEAD (405/501) ou répond une erreur
+    (certains serveurs ne gèrent pas HEAD correctement). Requête
+    conditionnelle si on a déjà un ETag / Last-Modified pour cette URL.
+    Une URL malformée est notée en erreur comme un lien injoignable.
+    """
+    import httpx
+
+    headers = {}
+    if row["checked_url"] == row["url"]:
+        if row["etag"]:
+            headers["If-None-Match"] = row["etag"]
+        if row["last_modified"]:
+            headers["If-Modified-Since"] = row["last_modified"]
+
+    result = {
+        "tool_id": row["id"],
+        "url": row["url"],
+        "status_code": None,
+        "final_url": None,
+        "latency_ms": None,
+        "etag": row["etag"] if headers else None,
+        "last_modified": row["last_modified"] if headers else None,
+        "error": None,
+    }
+    t0 = time.perf_counter()
+    try:
+        resp = await client.head(row["url"], headers=headers)
+        if resp.status_code in (403, 404, 405) or resp.status_code >= 500:
+            # GET en streaming : on ne lit pas le corps
+            async with client.stream("GET", row["url"], headers=headers) as resp:
+                pass
+        result["status_code"] = resp.status_code
+        result["final_url"] = str(resp.url)
+        if resp.status_code != 304:
+            result["etag"] = resp.headers.get("etag")
+            result["last_modified"] = resp.headers.get("last-modified")
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"[:200]
+    result["latency_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    result["is_dead"] = int(is_dead_status(result["status_code"], result["error"]))
+    return result
+
+
+def _save_link_results(results: list) -> None:
+    now = datetime.utcnow().isoformat()
+    with get_db() as db:
+        db.executemany(
+            """
+            INSERT INTO link_health (
+                tool_id, url, status_code, final_url, latency_ms,
+                etag, last_modified, is_dead, error, checked_at
+            )
+            VALUES (
+                :tool_id, :url, :status_code, :final_url, :latency_ms,
+                :etag, :last_modified, :is_dead, :error, :checked_at
+            )
+            ON CONFLICT (tool_id) DO UPDATE SET
+                url = excluded.url,
+                status_code = excluded.status_code,
+                final_url = COALESCE(excluded.final_url, final_url),
+                latency_ms = excluded.latency_ms,
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                is_dead = excluded.is_dead,
+                error = excluded.error,
+                checked_at = excluded.checked_at;
+            """,
+            [dict(r, checked_at=now) for r in results],
+        )
+
+
+def stale_links(max_age_hours: float = LINK_CHECK_MAX_AGE_HOURS) -> list:
+    """
+    Outils publiés jamais vérifiés, vérifiés il y a plus de max_age_hours,
+    ou dont l'URL a changé depuis la dernière vérification.
+    """
+    cutoff = (datetime.utcnow() - timedelta(hours=max_age_hours)).isoformat()
+    with get_db() as db:
+        rows = db.execute(
+            """
+            SELECT t.id, t.url, lh.url AS checked_url, lh.etag, lh.last_modified
+            FROM tools t
+            LEFT JOIN link_health lh ON lh.tool_id = t.id
+            WHERE t.is_published = 1
+              AND (lh.checked_at IS NULL OR lh.checked_at < ? OR lh.url != t.url)
+            ORDER BY lh.checked_at IS NOT NULL, lh.checked_at;
+            """,
+            (cutoff,),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+async def fetch_bounded(
+    rows: list,
+    url_key: str,
+    probe,
+    concurrency: int,
+    per_host: int,
+    timeout: float,
+):
+    """
+    Générateur asynchrone : applique probe(client, row) à chaque ligne avec au
+    plus `concurrency` requêtes en vol au total et `per_host` par hôte, et
+    rend les résultats dans l'ordre où ils arrivent.
+    """
+    import httpx  # import local : inutile au démarrage des workers web
+
+    global_sem = asyncio.Semaphore(concurrency)
+    host_sems: dict = {}
+
+    async def run(row):
+        try:
+            host = urlsplit(row[url_key]).hostname or ""
+        except ValueError:
+            host = ""  # URL malformée : probe() la signalera
+        host_sem = host_sems.setdefault(host, asyncio.Semaphore(per_host))
+        async with host_sem, global_sem:
+            return await probe(client, row)
+
+    async with httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=concurrency),
+        follow_redirects=True,
+        headers={"User-Agent": HTTP_USER_AGENT},
+    ) as client:
+        for fut in asyncio.as_completed([run(r) for r in rows]):
+            yield await fut
+
+
+async def _check_links(
+    rows: list,
+    concurrency: int,
+    per_host: int,
+    timeout: float,
+) -> dict:
+    counts = {"checked": 0, "dead": 0, "not_modified": 0}
+    pending: list = []
+
+    async for result in fetch_bounded(rows, "url", _probe_link, concurrency, per_host, timeout):
+        counts["checked"] += 1
+        counts["dead"] += result["is_dead"]
+        counts["not_modified"] += result["status_code"] == 304
+        pending.append(result)
+        if len(pending) >= LINK_CHECK_WRITE_BATCH:
+            _save_link_results(pending)
+            pending = []
+    if pending:
+        _save_link_results(pending)
+    return counts
+
+
+def check_links(
+    max_age_hours: float = LINK_CHECK_MAX_AGE_HOURS,
+    concurrency: int = LINK_CHECK_CONCURRENCY,
+    per_host: int = LINK_CHECK_PER_HOST,
+    timeout: float = LINK_CHECK_TIMEOUT,
+) -> dict:
+    """
+    Vérifie en parallèle les liens périmés (voir stale_links) et enregistre
+    les résultats par lots dans link_health.
+    """
+    rows = stale_links(max_age_hours)
+    if not rows:
+        return {"checked": 0, "dead": 0, "not_modified": 0}
+    return asyncio.run(_check_links(rows, concurrency, per_host, timeout))
+
+
+@tools_cli.command("check-links")
+@click.option("--max-age-hours", type=float, default=LINK_CHECK_MAX_AGE_HOURS, show_default=True,
+              help="Revérifie les liens plus vieux que ça (0 = tous).")
+@click.option("--concurrency", type=int, default=LINK_CHECK_CONCURRENCY, show_default=True)
+@click.option("--per-host", type=int, default=LINK_CHECK_PER_HOST, show_default=True)
+@click.option("--timeout", type=float, default=LINK_CHECK_TIMEOUT, show_default=True)
+def check_links_command(max_age_hours, concurrency, per_host, timeout):
+    """Vérifie les liens des outils publiés."""
+    t0 = time.perf_counter()
+    counts = check_links(max_age_hours, concurrency, per_host, timeout)
+    click.echo(
+        "{checked} lien(s) vérifié(s), {dead} mort(s), {not_modified} inchangé(s) (304)".format(**counts)
+        + f" en {time.perf_counter() - t0:.1f}s."
+    )
+
+
+# ============================================================
+# COPIE LOCALE DES LOGOS
+# ============================================================
+
+def _make_thumbnail(data: bytes) -> bytes:
+    """
+    Vignette WebP d'au plus LOGO_SIZE px de côté. Lève une exception si les
+    octets ne sont pas une image lisible par Pillow. Les dimensions sont lues
+    dans l'en-tête et vérifiées avant décodage (bombe de décompression).
+    """
+    import io
+
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data), formats=["PNG", "JPEG", "GIF", "WEBP"]) as img:
+        if img.width * img.height > LOGO_MAX_PIXELS:
+            raise ValueError(f"image trop grande ({img.width}x{img.height})")
+        img.load()
+        img = img.convert("RGBA")
+        img.thumbnail((LOGO_SIZE, LOGO_SIZE))
+        out = io.BytesIO()
+        img.save(out, format="WEBP", quality=85)
+    return out.getvalue()
+
+
+def _store_logo(thumb: bytes) -> str:
+    """
+    Écrit la vignette sous son hash (écriture atomique, dédupliquée).
+    Retourne le nom de fichier relatif à LOGO_CACHE_DIR.
+    """
+    filename = hashlib.sha256(thumb).hexdigest() + ".webp"
+    path = os.path.join(LOGO_CACHE_DIR, filename)
+    if not os.path.exists(path):
+        os.makedirs(LOGO_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(thumb)
+        os.replace(tmp, path)
+    return filename
+
+
+def _is_public_address(addr) -> bool:
+    return addr.is_global and not addr.is_multicast
+
+
+async def _resolve_public_host(url: str) -> str:
+    """
+    Résout l'hôte de l'URL et retourne l'adresse à laquelle se connecter.
+    Lève ValueError si l'une des adresses n'est pas publique (loopback,
+    privée, link-local, réservée...) : le serveur ne doit pas servir de
+    relais vers son propre réseau. L'appelant se connecte à cette adresse
+    précise (voir _fetch_logo) : pas de seconde résolution DNS exploitable
+    par un rebinding.
+    """
+    import ipaddress
+    import socket
+
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("URL invalide")
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        parts.hostname, parts.port or (443 if parts.scheme == "https" else 80),
+        type=socket.SOCK_STREAM,
+    )
+    addrs = [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+    if not addrs:
+        raise ValueError("hôte sans adresse")
+    if not LOGO_ALLOW_PRIVATE:
+        for addr in addrs:
+            if not _is_public_address(addr):
+                raise ValueError(f"adresse non publique : {addr}")
+    return str(addrs[0])
+
+
+async def _fetch_logo(client, row: dict) -> dict:
+    """
+    GET conditionnel du logo d'origine, en streaming pour couper au-delà de
+    LOGO_MAX_BYTES. 304 : on garde la vignette actuelle. Pas de redirection
+    suivie, et connexion directe à l'adresse publique vérifiée par
+    _resolve_public_host ; Host et SNI gardent le nom d'origine (le
+    certificat TLS est vérifié pour ce nom).
+    """
+    import httpx
+
+    same_source = row["source_url"] == row["logo_url"]
+    headers = {}
+    if same_source and row["filename"]:
+        if row["etag"]:
+            headers["If-None-Match"] = row["etag"]
+        if row["last_modified"]:
+            headers["If-Modified-Since"] = row["last_modified"]
+
+    result = {
+        "tool_id": row["id"],
+        "source_url": row["logo_url"],
+        "filename": row["filename"] if same_source else None,
+        "etag": row["etag"] if same_source else None,
+        "last_modified": row["last_modified"] if same_source else None,
+        "error": None,
+        "changed": False,
+    }
+    try:
+        url = httpx.URL(row["logo_url"])
+        ip = await _resolve_public_host(row["logo_url"])
+        async with client.stream(
+            "GET",
+            url.copy_with(host=ip),
+            headers={**headers, "Host": url.netloc.decode("ascii")},
+            extensions={"sni_hostname": url.raw_host.decode("ascii")},
+            follow_redirects=False,
+        ) as resp:
+            if resp.status_code == 304:
+                return result
+            if resp.status_code != 200:
+                raise ValueError(f"HTTP {resp.status_code}")
+            ctype = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+            if ctype not in LOGO_CONTENT_TYPES:
+                raise ValueError(f"type non supporté : {ctype or '?'}")
+            if int(resp.headers.get("content-length") or 0) > LOGO_MAX_BYTES:
+                raise ValueError("image trop lourde")
+            chunks, size = [], 0
+            async for chunk in resp.aiter_bytes():
+                size += len(chunk)
+                if size > LOGO_MAX_BYTES:
+                    raise ValueError("image trop lourde")
+                chunks.append(chunk)
+            etag = resp.headers.get("etag")
+            last_modified = resp.headers.get("last-modified")
+
+        # Décodage / redimensionnement hors de la boucle d'événements
+        try:
+            thumb = await asyncio.to_thread(_make_thumbnail, b"".join(chunks))
+        except Exception as e:  # Pillow lève des types variés : échec de ce logo seul
+            raise ValueError(f"image illisible ({type(e).__name__}: {e})") from e
+        filename = _store_logo(thumb)
+        result.update(
+            filename=filename,
+            etag=etag,
+            last_modified=last_modified,
+            changed=filename != row["filename"],
+        )
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError, OSError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"[:200]
+    return result
+
+
+def stale_logos(refresh_hours: float = LOGO_REFRESH_HOURS) -> list:
+    """
+    Outils publiés avec un logo distant (http/https) jamais copié, dont
+    logo_url a changé, ou à revalider auprès de l'origine.
+    """
+    cutoff = (datetime.utcnow() - timedelta(hours=refresh_hours)).isoformat()
+    with get_db() as db:
+        rows = db.execute(
+            """
+            SELECT t.id, t.logo_url, lc.source_url, lc.filename,
+                   lc.etag, lc.last_modified
+            FROM tools t
+            LEFT JOIN logo_cache lc ON lc.tool_id = t.id
+            WHERE t.is_published = 1
+              AND (t.logo_url LIKE 'http://%' OR t.logo_url LIKE 'https://%')
+              AND (
+                lc.tool_id IS NULL
+                OR lc.source_url != t.logo_url
+                OR lc.fetched_at < ?
+              );
+            """,
+            (cutoff,),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def _save_logo_results(results: list) -> None:
+    now = datetime.utcnow().isoformat()
+    with get_db() as db:
+        db.executemany(
+            """
+            INSERT INTO logo_cache (
+                tool_id, source_url, filename, etag, last_modified, error, fetched_at
+            )
+            VALUES (
+                :tool_id, :source_url, :filename, :etag, :last_modified, :error, :fetched_at
+            )
+            ON CONFLICT (tool_id) DO UPDATE SET
+                source_url = excluded.source_url,
+                filename = excluded.filename,
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                error = excluded.error,
+                fetched_at = excluded.fetched_at;
+            """,
+            [dict(r, fetched_at=now) for r in results],
+        )
+
+
+async def _mirror_logos(rows: list, concurrency: int, per_host: int, timeout: float) -> dict:
+    counts = {"checked": 0, "updated": 0, "failed": 0}
+    pending: list = []
+    async for result in fetch_bounded(rows, "logo_url", _fetch_logo, concurrency, per_host, timeout):
+        counts["checked"] += 1
+        counts["updated"] += result["changed"]
+        counts["failed"] += result["error"] is not None
+        pending.append(result)
+        if len(pending) >= LOGO_WRITE_BATCH:
+            _save_logo_results(pending)
+            pending = []
+    if pending:
+        _save_logo_results(pending)
+    return counts
+
+
+def mirror_logos(
+    refresh_hours: float = LOGO_REFRESH_HOURS,
+    concurrency: int = LOGO_CONCURRENCY,
+    per_host: int = LOGO_PER_HOST,
+    timeout: float = LOGO_TIMEOUT,
+) -> dict:
+    """
+    Télécharge (ou revalide) les logos distants et les sert depuis /logos/.
+    """
+    rows = stale_logos(refresh_hours)
+    if not rows:
+        return {"checked": 0, "updated": 0, "failed": 0}
+    return asyncio.run(_mirror_logos(rows, concurrency, per_host, timeout))
+
+
+@background_job("mirror-logos", LOGO_MIRROR_INTERVAL)
+def mirror_logos_job() -> None:
+    counts = mirror_logos()
+    if counts["updated"] or counts["failed"]:
+        app.logger.info("Logos : %s", counts)
+
+
+@tools_cli.command("mirror-logos")
+@click.option("--refresh-hours", type=float, default=LOGO_REFRESH_HOURS, show_default=True,
+              help="Revalide auprès de l'origine les logos copiés il y a plus longtemps (0 = tous).")
+@click.option("--concurrency", type=int, default=LOGO_CONCURRENCY, show_default=True)
+@click.option("--per-host", type=int, default=LOGO_PER_HOST, show_default=True)
+@click.option("--timeout", type=float, default=LOGO_TIMEOUT, show_default=True)
+def mirror_logos_command(refresh_hours, concurrency, per_host, timeout):
+    """Copie localement les logos distants des outils publiés."""
+    counts = mirror_logos(refresh_hours, concurrency, per_host, timeout)
+    click.echo(
+        "{checked} logo(s) vérifié(s), {updated} mis à jour, {failed} en échec.".format(**counts)
+    )
+
+
+@app.route("/logos/<path:filename>")
+def mirrored_logo(filename: str):
+    # Nom = hash du contenu : la réponse ne change jamais
+    return send_from_directory(LOGO_CACHE_DIR, filename, max_age=31536000)
+
+
 # ============================================================
 # GOOGLE SEARCH CONSOLE
 # ============================================================
@@ -872,12 +3022,193 @@ def public_files(filename: str):
 
 
 # ============================================================
-# INIT DB
+# EXPORT STATIQUE
+# ============================================================
+
+def is_static_export() -> bool:
+    """Requête interne de flask export-static (pas un vrai visiteur)."""
+    return bool(request.environ.get(EXPORT_ENVIRON_KEY))
+
+
+def _export_file(path: str) -> str:
+    """
+    Chemin du fichier pour une URL publique, lisible par nginx avec
+    `try_files $uri $uri/index.html =404;`.
+    """
+    if path.endswith((".xml", ".txt")):
+        return path.lstrip("/")
+    return os.path.join(path.strip("/"), "index.html")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _export_render(job: tuple) -> int:
+    """
+    Rend une liste d'URLs via les vraies routes et les écrit dans out_dir.
+    Tourne dans un process du pool (fork) : chacun a son client de test.
+    """
+    out_dir, base_url, paths = job
+    client = app.test_client()
+    for path in paths:
+        resp = client.get(path, base_url=base_url, environ_base={EXPORT_ENVIRON_KEY: True})
+        if resp.status_code != 200:
+            raise RuntimeError(f"{path} : HTTP {resp.status_code}")
+        _write_atomic(os.path.join(out_dir, _export_file(path)), resp.get_data())
+    return len(paths)
+
+
+def _templates_fingerprint() -> str:
+    """Change si un template ou app.py change : tout est alors re-rendu."""
+    h = hashlib.sha1()
+    folder = os.path.join(app.root_path, app.template_folder)
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name), "rb") as f:
+            h.update(name.encode() + f.read())
+    with open(os.path.join(app.root_path, "app.py"), "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+
+def _published_fingerprints() -> dict:
+    """
+    {id: [slug, hash]} sur tout ce qu'affichent les pages d'un outil :
+    une fiche n'est re-rendue que si son hash change.
+    """
+    sql, params = _published_tools_sql(
+        columns=f"{TOOL_DETAIL_COLUMNS}, COALESCE(lh.is_dead, 0) AS link_dead"
+    )
+    with get_db() as db:
+        rows = db.execute(sql, params).fetchall()
+    return {
+        str(r["id"]): [r["slug"], hashlib.sha1(repr(tuple(r)).encode()).hexdigest()]
+        for r in rows
+    }
+
+
+def _sync_tree(src: str, dst: str) -> int:
+    """Copie les fichiers nouveaux ou modifiés (taille / mtime). Retourne le nombre copié."""
+    copied = 0
+    if not os.path.isdir(src):
+        return 0
+    for root, _dirs, files in os.walk(src):
+        for name in files:
+            s = os.path.join(root, name)
+            d = os.path.join(dst, os.path.relpath(s, src))
+            st = os.stat(s)
+            if os.path.exists(d):
+                dt = os.stat(d)
+                if dt.st_size == st.st_size and int(dt.st_mtime) == int(st.st_mtime):
+                    continue
+            os.makedirs(os.path.dirname(d), exist_ok=True)
+            shutil.copy2(s, d + ".tmp")
+            os.replace(d + ".tmp", d)
+            copied += 1
+    return copied
+
+
+def export_static(
+    out_dir: str,
+    base_url: str = EXPORT_BASE_URL,
+    jobs: int | None = None,
+    full: bool = False,
+) -> dict:
+    """
+    Exporte les pages publiques dans out_dir. Un manifeste garde le hash de
+    chaque fiche : les exports suivants ne re-rendent que les fiches
+    modifiées, supprimées ou ajoutées (+ les pages de liste si besoin).
+    """
+    out_dir = os.path.abspath(out_dir)
+    manifest_path = os.path.join(out_dir, EXPORT_MANIFEST)
+    previous: dict = {}
+    if not full and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            previous = json.load(f)
+
+    fingerprint = _templates_fingerprint()
+    if previous.get("templates") != fingerprint or previous.get("base_url") != base_url:
+        previous = {}
+    old_tools = previous.get("tools", {})
+    tools = _published_fingerprints()
+
+    changed = [slug for tid, (slug, h) in tools.items() if old_tools.get(tid) != [slug, h]]
+    # Par slug et non par id : un slug libéré peut être repris par un autre outil
+    live_slugs = {slug for slug, _h in tools.values()}
+    removed = sorted({slug for slug, _h in old_tools.values()} - live_slugs)
+
+    paths = [f"/tool/{slug}" for slug in changed]
+    if not previous or changed or removed:
+        paths += ["/", "/annuaire", "/sitemap.xml", "/robots.txt"]
+
+    if paths:
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1 or len(paths) < 2 * jobs:
+            _export_render((out_dir, base_url, paths))
+        else:
+            import concurrent.futures
+            import multiprocessing
+
+            chunks = [paths[i::jobs] for i in range(jobs)]
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=jobs,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                list(pool.map(_export_render, [(out_dir, base_url, c) for c in chunks]))
+
+    for slug in removed:
+        page = os.path.join(out_dir, _export_file(f"/tool/{slug}"))
+        if os.path.exists(page):
+            os.remove(page)
+            os.rmdir(os.path.dirname(page))
+
+    assets = (
+        _sync_tree(os.path.join(app.root_path, "static"), os.path.join(out_dir, "static"))
+        + _sync_tree(os.path.join(app.root_path, "public"), os.path.join(out_dir, "public"))
+        + _sync_tree(LOGO_CACHE_DIR, os.path.join(out_dir, "logos"))
+    )
+
+    manifest = {
+        "templates": fingerprint,
+        "base_url": base_url,
+        "exported_at": datetime.utcnow().isoformat(),
+        "tools": tools,
+    }
+    _write_atomic(manifest_path, json.dumps(manifest, indent=1).encode())
+    return {"rendered": len(paths), "removed": len(removed), "assets": assets}
+
+
+@app.cli.command("export-static")
+@click.argument("out_dir", type=click.Path(file_okay=False))
+@click.option("--base-url", default=EXPORT_BASE_URL, show_default=True,
+              help="URL publique du site (sitemap, robots.txt).")
+@click.option("--jobs", type=int, default=None, help="Process de rendu (défaut : nb de CPU).")
+@click.option("--full", is_flag=True, help="Ignore le manifeste et re-rend tout.")
+def export_static_command(out_dir, base_url, jobs, full):
+    """Exporte les pages publiques en fichiers statiques (nginx / CDN)."""
+    t0 = time.perf_counter()
+    counts = export_static(out_dir, base_url.rstrip("/"), jobs, full)
+    click.echo(
+        "{rendered} page(s) rendue(s), {removed} supprimée(s), {assets} fichier(s) copié(s)".format(**counts)
+        + f" en {time.perf_counter() - t0:.1f}s."
+    )
+
+
+# ============================================================
+# DÉMARRAGE
 # ============================================================
 
-with app.app_context():
-    init_db()
+check_schema()
+warm_templates()
 
 if __name__ == "__main__":
+    # En local (python app.py), on prépare la base directement
+    upgrade_db()
+    configure_db_file()
+    seed_db()
     port = int(os.getenv("PORT", "5000"))
     app.run(host="0.0.0.0", port=port, debug=True)
@@ -0,0 +1,232 @@
+"""
+Micro-benchmarks de l'annuaire.
+
+Usage :
+    python bench.py            # tous les benchs
+    python bench.py startup    # un seul bench
+
+Chaque bench tourne sur une base SQLite temporaire (DB_PATH) pour ne
+jamais toucher à annuaire.db.
+"""
+from __future__ import annotations
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _env(db_path: str) -> dict:
+    env = dict(os.environ)
+    env["DB_PATH"] = db_path
+    env.setdefault("STRIPE_SECRET_KEY", "sk_test_bench")
+    env.setdefault("STRIPE_PRICE_ID", "price_bench")
+    return env
+
+
+def _run(code: str, db_path: str) -> str:
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=HERE,
+        env=_env(db_path),
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return out.stdout.strip()
+
+
+# ============================================================
+# DÉMARRAGE D'UN WORKER
+# ============================================================
+
+_STARTUP_CODE = """
+import time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.check_schema()
+t2 = time.perf_counter()
+app.upgrade_db(); app.seed_db()
+t3 = time.perf_counter()
+print(t1 - t0, t2 - t1, t3 - t2)
+"""
+
+
+def bench_startup(runs: int = 7) -> None:
+    """
+    Cold start d'un worker (process neuf, base déjà migrée) :
+    - import : coût total de `import app` (ce que paie un worker sans --preload)
+    - check  : la seule requête BDD faite au démarrage (user_version)
+    - upgrade+seed : ce que chaque worker payait avant, à titre de comparaison
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        _run("import app; app.upgrade_db(); app.seed_db()", db_path)
+
+        imports, checks, upgrades = [], [], []
+        for _ in range(runs):
+            a, b, c = map(float, _run(_STARTUP_CODE, db_path).split())
+            imports.append(a)
+            checks.append(b)
+            upgrades.append(c)
+
+    print(f"startup ({runs} process neufs, médiane)")
+    print(f"  import app          : {statistics.median(imports) * 1000:8.2f} ms")
+    print(f"  check_schema        : {statistics.median(checks) * 1000:8.2f} ms")
+    print(f"  upgrade+seed (no-op): {statistics.median(upgrades) * 1000:8.2f} ms")
+
+
+# ============================================================
+# PAGE /annuaire (STREAMING + CACHE DE FRAGMENTS)
+# ============================================================
+
+_LISTING_CODE = """
+import sqlite3, time, tracemalloc
+import app
+app.upgrade_db()
+app.configure_db_file()
+db = sqlite3.connect(app.DB_PATH)
+db.executemany(
+    "INSERT INTO tools (name, url, short_description, slug, created_at, is_published)"
+    " VALUES (?, ?, ?, ?, '2024-01-01', 1)",
+    [(f"Outil {i}", f"https://outil{i}.example/", "Description courte " * 5, f"outil-{i}")
+     for i in range(%(n)d)],
+)
+db.commit()
+client = app.app.test_client()
+for label in ("froid", "chaud"):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    resp = client.get("/annuaire", buffered=False)
+    it = iter(resp.response)
+    next(it)
+    ttfb = time.perf_counter() - t0
+    for _chunk in it:
+        pass
+    total = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    resp.close()
+    print(label, ttfb, total, peak)
+"""
+
+
+def bench_listing(sizes=(200, 2000)) -> None:
+    """
+    /annuaire avec N outils : temps jusqu'au premier bloc, temps total et pic
+    mémoire Python, à froid (cartes à rendre) puis à chaud (cartes en cache).
+    """
+    print("listing /annuaire")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            out = _run(_LISTING_CODE % {"n": n}, os.path.join(tmp, "bench.db"))
+        for line in out.splitlines():
+            label, ttfb, total, peak = line.split()
+            print(
+                f"  {n:5d} outils {label} : 1er bloc {float(ttfb) * 1000:7.2f} ms,"
+                f" total {float(total) * 1000:8.2f} ms, pic {int(peak) / 1024:8.0f} Kio"
+            )
+
+
+# ============================================================
+# SAUVEGARDE À CHAUD PENDANT LE TRAFIC
+# ============================================================
+
+_BACKUP_CODE = """
+import os, sqlite3, statistics, threading, time
+import app
+app.upgrade_db()
+app.configure_db_file()  # WAL, comme en production
+db = sqlite3.connect(app.DB_PATH)
+assert db.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+db.executemany(
+    "INSERT INTO tools (name, url, long_description, slug, created_at, is_published)"
+    " VALUES (?, ?, ?, ?, '2024-01-01', 1)",
+    [(f"Outil {i}", f"https://outil{i}.example/", os.urandom(400).hex(), f"outil-{i}")
+     for i in range(%(n)d)],
+)
+db.commit()
+db.close()
+client = app.app.test_client()
+
+def traffic(stop):
+    reads, writes = [], []
+    i = 0
+    while not stop():
+        i += 1
+        t0 = time.perf_counter()
+        client.get(f"/api/tools/outil-{i %% %(n)d}")
+        reads.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        app.record_hit(i %% %(n)d + 1, "views")
+        app.flush_stats()
+        writes.append(time.perf_counter() - t0)
+    return reads, writes
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p))] * 1000
+
+deadline = time.perf_counter() + 1.0
+base = traffic(lambda: time.perf_counter() > deadline)
+
+done = threading.Event()
+info = {}
+def run_backup():
+    info.update(app.backup_db(os.path.join(os.path.dirname(app.DB_PATH), "bk")))
+    done.set()
+threading.Thread(target=run_backup).start()
+during = traffic(done.is_set)
+
+print("backup", info["db_bytes"], info["gz_bytes"], info["steps"], info["restarts"],
+      info["copy_seconds"], info["total_seconds"])
+for label, (reads, writes) in (("sans", base), ("pendant", during)):
+    print(label, len(reads), pct(reads, .5), pct(reads, .99), pct(writes, .5), pct(writes, .99))
+"""
+
+
+def bench_backup(n: int = 40000) -> None:
+    """
+    Durée de `backup_db` sur une base WAL de n outils, et latence p50/p99
+    d'une lecture API et d'une écriture (flush des compteurs) sans puis
+    pendant la sauvegarde.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        out = _run(_BACKUP_CODE % {"n": n}, os.path.join(tmp, "bench.db"))
+    lines = out.splitlines()
+    _, raw, gz, steps, restarts, copy_s, total_s = lines[0].split()
+    print(f"backup ({n} outils, WAL)")
+    print(
+        f"  base {int(raw) / 1e6:.1f} Mo -> gzip {int(gz) / 1e6:.1f} Mo, {steps} pas ({restarts} reprise(s)),"
+        f" copie {float(copy_s):.2f}s, total {float(total_s):.2f}s"
+    )
+    for line in lines[1:]:
+        label, count, r50, r99, w50, w99 = line.split()
+        print(
+            f"  {label:8s} ({int(count):5d} req) lecture p50 {float(r50):6.2f} ms p99 {float(r99):6.2f} ms"
+            f" | écriture p50 {float(w50):6.2f} ms p99 {float(w99):6.2f} ms"
+        )
+
+
+BENCHES = {
+    "startup": bench_startup,
+    "listing": bench_listing,
+    "backup": bench_backup,
+}
+
+
+def main(argv: list[str]) -> None:
+    names = argv or list(BENCHES)
+    for name in names:
+        t0 = time.perf_counter()
+        BENCHES[name]()
+        print(f"  [{name} en {time.perf_counter() - t0:.1f}s]\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
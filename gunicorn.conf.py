@@ -0,0 +1,14 @@
+# Config gunicorn lue automatiquement au lancement (`gunicorn app:app`).
+#
+# preload_app : app.py est importé une seule fois dans le master, puis les
+# workers sont forkés à partir de ce process déjà chaud (imports, templates,
+# vérification du schéma). Aucune connexion SQLite n'est gardée ouverte à
+# l'import, donc le fork est sans risque.
+#
+# Le schéma et le seed ne sont PAS faits ici : lancer avant le démarrage
+#   flask --app app db upgrade && flask --app app db seed
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+preload_app = True
@@ -0,0 +1,112 @@
+import itertools
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Avant l'import d'app : jamais de Stripe ni d'annuaire.db réels en test
+_TMP = tempfile.mkdtemp(prefix="annuaire-tests-")
+os.environ["DB_PATH"] = os.path.join(_TMP, "import.db")
+os.environ["STRIPE_SECRET_KEY"] = ""
+os.environ["STRIPE_PRICE_ID"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Module app sur une base neuve et un cache de logos vide."""
+    monkeypatch.setattr(app_module, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(app_module, "LOGO_CACHE_DIR", str(tmp_path / "logos"))
+    app_module.upgrade_db()
+    return app_module
+
+
+class FakeSessions:
+    """Remplace stripe.checkout.Session : sessions gardées en mémoire."""
+
+    def __init__(self):
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.fail_create = False
+        self.on_expire = None  # appelé pendant expire(), pour simuler une course
+
+    def create(self, **kwargs):
+        if self.fail_create:
+            raise RuntimeError("Stripe indisponible")
+        sid = f"cs_test_{next(self.ids)}"
+        self.sessions[sid] = {
+            "id": sid, "status": "open", "payment_status": "unpaid", "metadata": kwargs["metadata"],
+        }
+        return type("Session", (), {"id": sid, "url": f"https://checkout.test/{sid}"})
+
+    def retrieve(self, sid):
+        return dict(self.sessions[sid])
+
+    def expire(self, sid):
+        if self.sessions[sid]["status"] != "open":
+            raise RuntimeError("session non ouverte")
+        self.sessions[sid]["status"] = "expired"
+        if self.on_expire:
+            self.on_expire(sid)
+        return dict(self.sessions[sid])
+
+
+@pytest.fixture
+def stripe_sessions(app, monkeypatch):
+    fake = FakeSessions()
+    monkeypatch.setattr(app, "STRIPE_SECRET_KEY", "sk_test")
+    monkeypatch.setattr(app, "STRIPE_PRICE_ID", "price_test")
+    monkeypatch.setattr(app.stripe.checkout, "Session", fake)
+    return fake
+
+
+# Routes du serveur de test : chemin -> fonction(handler) qui répond
+ROUTES: dict = {}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def _dispatch(self):
+        route = ROUTES.get(self.path.split("?")[0])
+        if route is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        route(self)
+
+    do_GET = do_HEAD = _dispatch
+
+    def reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """
+    Serveur HTTP local. Les tests déclarent leurs routes dans ROUTES ; la
+    fixture renvoie l'URL de base (http://127.0.0.1:<port>).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        ROUTES.clear()
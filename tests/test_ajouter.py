@@ -0,0 +1,55 @@
+def submit(app, name, url="https://outil.example/"):
+    client = app.app.test_client()
+    return client.post("/ajouter", data={"name": name, "url": url, "short_description": name})
+
+
+def draft(app):
+    with app.get_db() as db:
+        return db.execute("SELECT id, name, stripe_session_id FROM tools WHERE is_published = 0;").fetchall()
+
+
+def test_pending_draft_cannot_be_taken_over(app, stripe_sessions):
+    assert submit(app, "Premier").status_code == 303
+    resp = submit(app, "Second")
+    assert resp.status_code == 409
+    assert "en cours de référencement" in resp.get_data(as_text=True)
+    [row] = draft(app)
+    assert row["name"] == "Premier"
+    assert row["stripe_session_id"] == "cs_test_1"
+
+
+def test_expired_draft_is_reused(app, stripe_sessions):
+    assert submit(app, "Premier").status_code == 303
+    stripe_sessions.sessions["cs_test_1"]["status"] = "expired"
+    assert submit(app, "Second").status_code == 303
+    [row] = draft(app)
+    assert row["name"] == "Second"
+    assert row["stripe_session_id"] == "cs_test_2"
+
+
+def test_stripe_error_keeps_other_users_draft(app, stripe_sessions):
+    assert submit(app, "Premier").status_code == 303
+    stripe_sessions.fail_create = True
+    assert submit(app, "Second").status_code == 409
+    assert [r["name"] for r in draft(app)] == ["Premier"]
+
+
+def test_stripe_error_deletes_own_new_draft(app, stripe_sessions):
+    stripe_sessions.fail_create = True
+    assert submit(app, "Premier").status_code == 500
+    assert draft(app) == []
+
+
+def test_reaper_does_not_delete_draft_taken_over_meanwhile(app, stripe_sessions):
+    assert submit(app, "Premier").status_code == 303
+    taken_over = []
+    # Pendant que le reaper expire cs_test_1, une nouvelle soumission reprend le brouillon
+    stripe_sessions.on_expire = lambda sid: taken_over.append(submit(app, "Second").status_code)
+
+    counts = app.reap_drafts(ttl_hours=0, vacuum_pages=0)
+
+    assert taken_over == [303]
+    assert counts["deleted"] == 0
+    [row] = draft(app)
+    assert row["name"] == "Second"
+    assert row["stripe_session_id"] == "cs_test_2"
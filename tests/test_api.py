@@ -0,0 +1,80 @@
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    with app.get_db() as db:
+        db.executemany(
+            "INSERT INTO tools (name, url, slug, created_at, is_published) VALUES (?, ?, ?, '2024-01-01', 1);",
+            [(f"Outil {i}", f"https://outil{i}.example/", f"outil-{i}") for i in range(3)],
+        )
+    return app.app.test_client()
+
+
+def bump_popularity(app):
+    with app.get_db() as db:
+        tool_id = db.execute("SELECT id FROM tools WHERE slug = 'outil-0';").fetchone()[0]
+    app.record_hit(tool_id, "views")
+    app.flush_stats()
+    assert app.recompute_popularity() == 1
+
+
+@pytest.mark.parametrize("path", ["/api/tools?fields=popularity", "/api/tools/outil-0?fields=popularity"])
+def test_etag_changes_with_popularity(app, client, path):
+    etag = client.get(path).headers["ETag"]
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    bump_popularity(app)
+    resp = client.get(path, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("path", ["/api/tools", "/api/tools/outil-0"])
+def test_etag_ignores_popularity_when_not_requested(app, client, path):
+    etag = client.get(path).headers["ETag"]
+    bump_popularity(app)
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "YWJj", "%FF"])
+def test_bad_cursor(client, cursor):
+    resp = client.get(f"/api/tools?cursor={cursor}")
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": "cursor invalide"}
+
+
+def test_cursor_pagination(app, client):
+    first = client.get("/api/tools?limit=2").get_json()
+    assert len(first["data"]) == 2
+    second = client.get(f"/api/tools?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [t["slug"] for t in second["data"]] == ["outil-2"]
+    assert second["next_cursor"] is None
+
+
+def test_detail_routes_share_the_query(app, client):
+    with app.get_db() as db:
+        tool_id = db.execute("SELECT id FROM tools WHERE slug = 'outil-1';").fetchone()[0]
+        db.execute(
+            "UPDATE tools SET logo_url = 'https://cdn.example/l.png', long_description = 'Longue' WHERE id = ?;",
+            (tool_id,),
+        )
+        db.execute(
+            "INSERT INTO logo_cache (tool_id, source_url, filename, fetched_at)"
+            " VALUES (?, 'https://cdn.example/l.png', 'abc.webp', '2024-01-01');",
+            (tool_id,),
+        )
+        db.execute(
+            "INSERT INTO link_health (tool_id, url, is_dead, checked_at) VALUES (?, 'https://outil1.example/', 1, '2024-01-01');",
+            (tool_id,),
+        )
+
+    data = client.get("/api/tools/outil-1?fields=name,long_description,logo_url,link_dead").get_json()
+    assert data == {
+        "id": tool_id, "name": "Outil 1", "long_description": "Longue",
+        "logo_url": "/logos/abc.webp", "link_dead": 1,
+    }
+    page = client.get("/tool/outil-1").get_data(as_text=True)
+    assert "/logos/abc.webp" in page and "Longue" in page
+    assert client.get("/tool/inconnu").status_code == 404
+    assert client.get("/api/tools/inconnu").status_code == 404
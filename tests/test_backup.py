@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def populated(app):
+    app.configure_db_file()
+    app.seed_db()
+    return app
+
+
+def count_tools(app):
+    with app.get_db() as db:
+        return db.execute("SELECT COUNT(*) FROM tools;").fetchone()[0]
+
+
+def test_backup_check_and_restore(populated, tmp_path):
+    app = populated
+    runner = app.app.test_cli_runner()
+    before = count_tools(app)
+
+    info = app.backup_db(str(tmp_path / "bk"), pages=4, sleep=0)
+    assert os.path.exists(info["path"]) and os.path.exists(info["path"] + ".sha256")
+    name = os.path.basename(info["path"])
+    assert sorted(os.listdir(tmp_path / "bk")) == [name, name + ".sha256"]
+
+    result = runner.invoke(args=["db", "restore", info["path"], "--check-only"])
+    assert result.exit_code == 0, result.output
+    assert f"schéma {app.SCHEMA_VERSION}" in result.output
+
+    with app.get_db() as db:
+        db.execute("DELETE FROM tools;")
+    assert count_tools(app) == 0
+
+    result = runner.invoke(args=["db", "restore", info["path"], "--yes"])
+    assert result.exit_code == 0, result.output
+    assert count_tools(app) == before
+
+
+def test_tampered_backup_is_refused(populated, tmp_path):
+    app = populated
+    info = app.backup_db(str(tmp_path / "bk"), sleep=0)
+    with open(info["path"], "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    result = app.app.test_cli_runner().invoke(args=["db", "restore", info["path"], "--yes"])
+    assert result.exit_code != 0
+    assert "somme de contrôle invalide" in result.output
+    assert count_tools(app) > 0
+
+
+def test_rotation_keeps_latest(populated, tmp_path, monkeypatch):
+    app = populated
+    dest = str(tmp_path / "bk")
+    stamps = iter(["20240101T000000Z", "20240102T000000Z", "20240103T000000Z"])
+
+    class FakeDatetime(app.datetime):
+        @classmethod
+        def utcnow(cls):
+            return cls.strptime(next(stamps), "%Y%m%dT%H%M%SZ")
+
+    monkeypatch.setattr(app, "datetime", FakeDatetime)
+    for _ in range(3):
+        app.backup_db(dest, sleep=0, keep=2)
+
+    assert [os.path.basename(p) for p in app.list_backups(dest)] == [
+        "annuaire-20240102T000000Z.db.gz",
+        "annuaire-20240103T000000Z.db.gz",
+    ]
+
+
+def test_failed_backup_leaves_no_temp_file(populated, tmp_path, monkeypatch):
+    app = populated
+
+    def boom(_seconds):
+        raise RuntimeError("interrompu")
+
+    monkeypatch.setattr(app.time, "sleep", boom)
+    dest = tmp_path / "bk"
+    with pytest.raises(RuntimeError):
+        app.backup_db(str(dest), pages=1, sleep=0.01)
+    assert os.listdir(dest) == []
@@ -0,0 +1,60 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "url, canonical",
+    [
+        ("https://www.Chat.openai.com/?utm_source=x", "chat.openai.com"),
+        ("chat.openai.com:443/", "chat.openai.com"),
+        ("https://x.example/?ref=hn&fbclid=1", "x.example"),
+        ("https://x.example/?referral=1&refresh=2&reference=3", "x.example?reference=3&referral=1&refresh=2"),
+        ("http://x.example:8080/app/", "x.example:8080/app"),
+    ],
+)
+def test_canonicalize_url(app, url, canonical):
+    assert app.canonicalize_url(url) == canonical
+
+
+@pytest.mark.parametrize("url", ["http://example.com:99999/", "http://[::1"])
+def test_canonicalize_url_rejects_malformed(app, url):
+    with pytest.raises(ValueError):
+        app.canonicalize_url(url)
+
+
+@pytest.mark.parametrize("url", ["http://example.com:99999/", "http://[::1"])
+def test_submit_malformed_url_is_400(app, monkeypatch, url):
+    monkeypatch.setattr(app, "STRIPE_SECRET_KEY", "sk_test")
+    monkeypatch.setattr(app, "STRIPE_PRICE_ID", "price_test")
+    resp = app.app.test_client().post("/ajouter", data={"name": "Outil", "url": url})
+    assert resp.status_code == 400
+
+
+def test_malformed_stored_urls_are_skipped(app):
+    with app.get_db() as db:
+        db.executemany(
+            "INSERT INTO tools (name, url, slug, created_at, is_published) VALUES (?, ?, ?, '2024-01-01', 1);",
+            [
+                ("A", "https://a.example/", "a"),
+                ("B", "https://www.a.example/?utm_source=x", "b"),
+                ("C", "http://[::1", "c"),
+            ],
+        )
+        # Rejoue le remplissage de la migration 6 sur ces lignes sans URL canonique
+        app._migration_6_duplicates(db)
+        rows = {r["slug"]: r for r in db.execute("SELECT id, slug, canonical_url, duplicate_of FROM tools;")}
+
+    assert rows["a"]["canonical_url"] == "a.example"
+    assert rows["b"]["canonical_url"] is None
+    assert rows["b"]["duplicate_of"] == rows["a"]["id"]
+    assert rows["c"]["canonical_url"] is None
+    assert [rows["a"]["id"], rows["b"]["id"]] in app.duplicate_clusters()
+
+
+def test_migration_8_keeps_ref_prefixed_params(app):
+    with app.get_db() as db:
+        db.execute(
+            "INSERT INTO tools (name, url, slug, created_at, is_published, canonical_url)"
+            " VALUES ('A', 'https://a.example/?referral=1', 'a', '2024-01-01', 1, 'a.example');"
+        )
+        app._migration_8_recanonicalize(db)
+        assert db.execute("SELECT canonical_url FROM tools;").fetchone()[0] == "a.example?referral=1"
@@ -0,0 +1,62 @@
+import json
+import os
+
+
+def add_tool(app, name, slug):
+    with app.get_db() as db:
+        return db.execute(
+            "INSERT INTO tools (name, url, short_description, slug, created_at, is_published)"
+            " VALUES (?, ?, ?, ?, '2024-01-01', 1);",
+            (name, f"https://{slug}.example/", f"Description de {name}", slug),
+        ).lastrowid
+
+
+def page(out, slug):
+    return os.path.join(out, "tool", slug, "index.html")
+
+
+def export(app, out):
+    return app.export_static(str(out), base_url="https://annuaire.test", jobs=1)
+
+
+def test_incremental_export(app, tmp_path):
+    out = tmp_path / "site"
+    a = add_tool(app, "Alpha", "alpha")
+    add_tool(app, "Beta", "beta")
+
+    first = export(app, out)
+    assert first["rendered"] == 2 + 4  # fiches + /, /annuaire, sitemap, robots
+    assert os.path.exists(page(out, "alpha")) and os.path.exists(page(out, "beta"))
+    assert os.path.exists(out / "annuaire" / "index.html")
+
+    # Rien n'a changé : rien n'est re-rendu
+    assert export(app, out)["rendered"] == 0
+
+    with app.get_db() as db:
+        db.execute("UPDATE tools SET short_description = 'Nouvelle description' WHERE id = ?;", (a,))
+    assert export(app, out)["rendered"] == 1 + 4
+    with open(page(out, "alpha"), encoding="utf-8") as f:
+        assert "Nouvelle description" in f.read()
+
+    with app.get_db() as db:
+        db.execute("DELETE FROM tools WHERE slug = 'beta';")
+    counts = export(app, out)
+    assert counts["removed"] == 1
+    assert not os.path.exists(page(out, "beta"))
+
+
+def test_reused_slug_is_rendered_not_removed(app, tmp_path):
+    out = tmp_path / "site"
+    add_tool(app, "Gemini", "gemini-google-ai")
+    export(app, out)
+
+    # Outil supprimé puis republié sous le même slug (nouvel id)
+    with app.get_db() as db:
+        db.execute("DELETE FROM tools WHERE slug = 'gemini-google-ai';")
+    new_id = add_tool(app, "Gemini", "gemini-google-ai")
+    counts = export(app, out)
+
+    assert counts["removed"] == 0
+    assert os.path.exists(page(out, "gemini-google-ai"))
+    with open(out / ".export-manifest.json", encoding="utf-8") as f:
+        assert json.load(f)["tools"][str(new_id)][0] == "gemini-google-ai"
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from conftest import ROUTES
+
+
+def probe(app, url, etag=None, timeout=2.0):
+    row = {"id": 1, "url": url, "checked_url": url if etag else None, "etag": etag, "last_modified": None}
+
+    async def run():
+        return [r async for r in app.fetch_bounded([row], "url", app._probe_link, 4, 2, timeout)]
+
+    return asyncio.run(run())[0]
+
+
+def test_head_refused_falls_back_to_get(app, stub_server):
+    ROUTES["/nohead"] = lambda h: h.reply(405 if h.command == "HEAD" else 200)
+    result = probe(app, stub_server + "/nohead")
+    assert result["status_code"] == 200
+    assert not result["is_dead"]
+
+
+def test_redirect_is_followed(app, stub_server):
+    ROUTES["/old"] = lambda h: h.reply(301, headers={"Location": "/new"})
+    ROUTES["/new"] = lambda h: h.reply(200)
+    result = probe(app, stub_server + "/old")
+    assert result["status_code"] == 200
+    assert result["final_url"] == stub_server + "/new"
+    assert not result["is_dead"]
+
+
+def test_conditional_request_not_modified(app, stub_server):
+    def etag(h):
+        if h.headers.get("If-None-Match") == '"v1"':
+            h.reply(304)
+        else:
+            h.reply(200, headers={"ETag": '"v1"'})
+
+    ROUTES["/etag"] = etag
+    first = probe(app, stub_server + "/etag")
+    assert first["status_code"] == 200 and first["etag"] == '"v1"'
+    again = probe(app, stub_server + "/etag", etag='"v1"')
+    assert again["status_code"] == 304
+    assert again["etag"] == '"v1"'
+    assert not again["is_dead"]
+
+
+def test_not_found_is_dead(app, stub_server):
+    result = probe(app, stub_server + "/missing")
+    assert result["status_code"] == 404
+    assert result["is_dead"]
+
+
+def test_timeout_is_dead(app, stub_server):
+    ROUTES["/slow"] = lambda h: (time.sleep(1.5), h.reply(200))
+    result = probe(app, stub_server + "/slow", timeout=0.3)
+    assert result["status_code"] is None
+    assert "Timeout" in result["error"]
+    assert result["is_dead"]
+
+
+def test_dns_failure_is_dead(app):
+    result = probe(app, "http://annuaire-test.invalid/")
+    assert result["error"]
+    assert result["is_dead"]
+
+
+def test_malformed_urls_do_not_abort_the_run(app, stub_server):
+    ROUTES["/ok"] = lambda h: h.reply(200)
+    urls = [stub_server + "/ok", "http://[::1", "http://example.com:99999/"]
+    with app.get_db() as db:
+        db.executemany(
+            "INSERT INTO tools (name, url, slug, created_at, is_published) VALUES (?, ?, ?, '2024-01-01', 1);",
+            [(f"Outil {i}", url, f"outil-{i}") for i, url in enumerate(urls)],
+        )
+
+    counts = app.check_links(max_age_hours=0, timeout=2.0)
+
+    assert counts["checked"] == 3
+    assert counts["dead"] == 2
+    with app.get_db() as db:
+        health = {r["url"]: r for r in db.execute("SELECT url, is_dead, error FROM link_health;")}
+    assert set(health) == set(urls)
+    assert not health[stub_server + "/ok"]["is_dead"]
+    assert health["http://[::1"]["is_dead"] and health["http://[::1"]["error"]
@@ -0,0 +1,173 @@
+import io
+import os
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from conftest import ROUTES
+
+
+def png(size=(64, 32)) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", size, "red").save(out, format="PNG")
+    return out.getvalue()
+
+
+def png_header_only(width, height) -> bytes:
+    """PNG de quelques octets qui annonce width x height pixels."""
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    idat = zlib.compress(b"\x00" * 64)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", idat) + chunk(b"IEND", b"")
+
+
+@pytest.fixture
+def logos(app, monkeypatch):
+    # Le serveur de test écoute sur 127.0.0.1
+    monkeypatch.setattr(app, "LOGO_ALLOW_PRIVATE", True)
+    return app
+
+
+def add_tools(app, *logo_urls):
+    with app.get_db() as db:
+        db.executemany(
+            "INSERT INTO tools (name, url, slug, logo_url, created_at, is_published)"
+            " VALUES (?, ?, ?, ?, '2024-01-01', 1);",
+            [(f"Outil {i}", f"https://outil{i}.example/", f"outil-{i}", url) for i, url in enumerate(logo_urls)],
+        )
+
+
+def cache(app) -> dict:
+    with app.get_db() as db:
+        return {r["source_url"]: dict(r) for r in db.execute("SELECT * FROM logo_cache;")}
+
+
+def mirror(app):
+    return app.mirror_logos(refresh_hours=0, timeout=2.0)
+
+
+def test_thumbnail_stored_then_revalidated_with_304(logos, stub_server):
+    hits = []
+
+    def logo(h):
+        hits.append(h.headers.get("If-None-Match"))
+        if h.headers.get("If-None-Match") == '"v1"':
+            h.reply(304)
+        else:
+            h.reply(200, png(), {"Content-Type": "image/png", "ETag": '"v1"'})
+
+    ROUTES["/logo.png"] = logo
+    url = stub_server + "/logo.png"
+    add_tools(logos, url)
+
+    assert mirror(logos) == {"checked": 1, "updated": 1, "failed": 0}
+    entry = cache(logos)[url]
+    path = os.path.join(logos.LOGO_CACHE_DIR, entry["filename"])
+    with Image.open(path) as img:
+        assert img.format == "WEBP"
+        assert max(img.size) <= logos.LOGO_SIZE
+
+    assert mirror(logos) == {"checked": 1, "updated": 0, "failed": 0}
+    assert hits == [None, '"v1"']
+    assert cache(logos)[url]["filename"] == entry["filename"]
+
+
+@pytest.mark.parametrize(
+    "status, body, ctype, error",
+    [
+        (404, b"", "image/png", "HTTP 404"),
+        (200, b"<html></html>", "text/html", "type non supporté"),
+        (200, b"\x89PNG pas vraiment", "image/png", "image illisible"),
+        (200, b"x" * 5000, "image/png", "trop lourde"),
+    ],
+    ids=["404", "html", "corrupt", "oversize"],
+)
+def test_bad_logo_is_recorded_as_error(logos, stub_server, monkeypatch, status, body, ctype, error):
+    monkeypatch.setattr(logos, "LOGO_MAX_BYTES", 1000)
+    ROUTES["/bad"] = lambda h: h.reply(status, body, {"Content-Type": ctype})
+    url = stub_server + "/bad"
+    add_tools(logos, url)
+
+    assert mirror(logos) == {"checked": 1, "updated": 0, "failed": 1}
+    entry = cache(logos)[url]
+    assert entry["filename"] is None
+    assert error in entry["error"]
+
+
+@pytest.mark.parametrize(
+    "side, error",
+    [
+        (8000, "trop grande"),  # refusé par LOGO_MAX_PIXELS, avant décodage
+        (20000, "DecompressionBombError"),  # refusé par Pillow dès l'ouverture
+    ],
+)
+def test_decompression_bomb_refused_without_aborting_run(logos, stub_server, side, error):
+    ROUTES["/bomb.png"] = lambda h: h.reply(200, png_header_only(side, side), {"Content-Type": "image/png"})
+    ROUTES["/ok.png"] = lambda h: h.reply(200, png(), {"Content-Type": "image/png"})
+    add_tools(logos, stub_server + "/bomb.png", stub_server + "/ok.png")
+
+    assert mirror(logos) == {"checked": 2, "updated": 1, "failed": 1}
+    entries = cache(logos)
+    assert error in entries[stub_server + "/bomb.png"]["error"]
+    assert entries[stub_server + "/ok.png"]["filename"]
+
+
+def test_redirect_not_followed(logos, stub_server):
+    ROUTES["/moved.png"] = lambda h: h.reply(302, headers={"Location": "/ok.png"})
+    ROUTES["/ok.png"] = lambda h: h.reply(200, png(), {"Content-Type": "image/png"})
+    add_tools(logos, stub_server + "/moved.png")
+
+    mirror(logos)
+    assert "HTTP 302" in cache(logos)[stub_server + "/moved.png"]["error"]
+
+
+def test_private_address_refused(app, stub_server):
+    hits = []
+    ROUTES["/logo.png"] = lambda h: (hits.append(1), h.reply(200, png(), {"Content-Type": "image/png"}))
+    url = stub_server + "/logo.png"
+    add_tools(app, url)
+
+    assert mirror(app)["failed"] == 1
+    assert "non publique" in cache(app)[url]["error"]
+    assert hits == []
+
+
+def test_connection_pinned_to_vetted_address(app, stub_server, monkeypatch):
+    import ipaddress
+    import socket
+
+    # Le serveur de test (127.0.0.1) joue le rôle de l'adresse publique vérifiée
+    monkeypatch.setattr(app, "_is_public_address", lambda addr: addr == ipaddress.ip_address("127.0.0.1"))
+
+    real_getaddrinfo = socket.getaddrinfo
+    lookups = []
+
+    def rebinding_dns(host, *args, **kwargs):
+        # Première réponse vérifiée, puis le nom ne résout plus : une seconde
+        # résolution (par httpx) ferait échouer la requête
+        if host == "logo.rebind.test":
+            lookups.append(host)
+            if len(lookups) > 1:
+                raise socket.gaierror("rebinding")
+            host = "127.0.0.1"
+        return real_getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", rebinding_dns)
+    hosts = []
+
+    def logo(h):
+        hosts.append(h.headers.get("Host"))
+        h.reply(200, png(), {"Content-Type": "image/png"})
+
+    ROUTES["/logo.png"] = logo
+    url = stub_server.replace("127.0.0.1", "logo.rebind.test") + "/logo.png"
+    add_tools(app, url)
+
+    assert mirror(app) == {"checked": 1, "updated": 1, "failed": 0}
+    assert lookups == ["logo.rebind.test"]
+    assert hosts == [url.split("/")[2]]
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+
+def add_tool(app):
+    with app.get_db() as db:
+        return db.execute(
+            "INSERT INTO tools (name, url, slug, created_at, is_published) VALUES ('A', 'https://a.example/', 'a', '2024-01-01', 1);"
+        ).lastrowid
+
+
+def test_recompute_prunes_stats_outside_window(app):
+    tool_id = add_tool(app)
+    today = app.datetime.utcnow().date()
+    old_day = (today - timedelta(days=app.POPULARITY_WINDOW_DAYS + 1)).isoformat()
+    with app.get_db() as db:
+        db.executemany(
+            "INSERT INTO tool_stats (tool_id, day, views, clicks) VALUES (?, ?, ?, 0);",
+            [(tool_id, old_day, 1000), (tool_id, today.isoformat(), 2)],
+        )
+
+    assert app.recompute_popularity() == 1
+    with app.get_db() as db:
+        assert [r["day"] for r in db.execute("SELECT day FROM tool_stats;")] == [today.isoformat()]
+        assert db.execute("SELECT popularity FROM tools;").fetchone()[0] == 2.0
+
+    # Rien n'a changé : aucune ligne réécrite
+    assert app.recompute_popularity() == 0
+
+
+def test_run_once_across_workers(app, tmp_path):
+    lock = str(tmp_path / "job.lock")
+    calls = []
+
+    assert app.run_once_across_workers(lock, 60, lambda: calls.append(1))
+    # Un autre worker dans l'intervalle : rien
+    assert not app.run_once_across_workers(lock, 60, lambda: calls.append(2))
+    assert calls == [1]
+
+    # Intervalle écoulé
+    with open(lock, "w") as f:
+        f.write("0")
+    assert app.run_once_across_workers(lock, 60, lambda: calls.append(3))
+    assert calls == [1, 3]
+
+
+def test_run_once_across_workers_skips_while_locked(app, tmp_path):
+    import fcntl
+
+    lock = str(tmp_path / "job.lock")
+    with open(lock, "a+") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        assert not app.run_once_across_workers(lock, 60, lambda: None)
@@ -0,0 +1,93 @@
+import pytest
+
+
+def add_draft(app, slug, session_id, created_at="2024-01-01"):
+    with app.get_db() as db:
+        return db.execute(
+            "INSERT INTO tools (name, url, slug, created_at, is_published, stripe_session_id)"
+            " VALUES (?, ?, ?, ?, 0, ?);",
+            (slug, f"https://{slug}.example/", slug, created_at, session_id),
+        ).lastrowid
+
+
+def add_session(stripe_sessions, sid, status="open", payment_status="unpaid"):
+    stripe_sessions.sessions[sid] = {"id": sid, "status": status, "payment_status": payment_status}
+
+
+def states(app) -> dict:
+    with app.get_db() as db:
+        return {r["slug"]: r["is_published"] for r in db.execute("SELECT slug, is_published FROM tools;")}
+
+
+def reap(app, **kwargs):
+    return app.reap_drafts(ttl_hours=24, vacuum_pages=0, **kwargs)
+
+
+def test_expired_and_open_sessions_are_deleted(app, stripe_sessions):
+    add_session(stripe_sessions, "cs_expired", status="expired")
+    add_session(stripe_sessions, "cs_open")
+    add_draft(app, "expired", "cs_expired")
+    add_draft(app, "open", "cs_open")
+
+    counts = reap(app)
+
+    assert counts["deleted"] == 2
+    assert states(app) == {}
+    # La session ouverte a été expirée avant suppression : plus payable
+    assert stripe_sessions.sessions["cs_open"]["status"] == "expired"
+
+
+def test_paid_session_publishes(app, stripe_sessions):
+    add_session(stripe_sessions, "cs_paid", status="complete", payment_status="paid")
+    add_draft(app, "paid", "cs_paid")
+
+    counts = reap(app)
+
+    assert counts["published"] == 1 and counts["deleted"] == 0
+    assert states(app) == {"paid": 1}
+
+
+def test_unverifiable_sessions_are_kept(app, stripe_sessions):
+    add_session(stripe_sessions, "cs_pending", status="complete", payment_status="unpaid")
+    add_draft(app, "pending", "cs_pending")  # paiement différé en cours
+    add_draft(app, "unknown", "cs_unknown")  # Stripe ne répond pas pour cette session
+
+    counts = reap(app)
+
+    assert counts["kept"] == 2 and counts["deleted"] == 0
+    assert states(app) == {"pending": 0, "unknown": 0}
+
+
+def test_without_stripe_nothing_is_deleted(app, stripe_sessions, monkeypatch):
+    monkeypatch.setattr(app, "STRIPE_SECRET_KEY", "")
+    add_session(stripe_sessions, "cs_expired", status="expired")
+    add_draft(app, "expired", "cs_expired")
+
+    assert reap(app)["kept"] == 1
+    assert states(app) == {"expired": 0}
+
+
+def test_recent_drafts_are_untouched(app, stripe_sessions):
+    add_session(stripe_sessions, "cs_open")
+    add_draft(app, "recent", "cs_open", created_at=app.datetime.utcnow().isoformat())
+
+    assert reap(app) == {"deleted": 0, "published": 0, "kept": 0, "orphaned": 0, "vacuumed_pages": 0}
+    assert stripe_sessions.sessions["cs_open"]["status"] == "open"
+
+
+@pytest.mark.parametrize("purge, remaining", [(False, {"legacy": 0}), (True, {})])
+def test_drafts_without_session(app, stripe_sessions, purge, remaining):
+    add_draft(app, "legacy", None)
+
+    counts = reap(app, purge_orphans=purge)
+
+    assert counts["orphaned"] == (0 if purge else 1)
+    assert counts["deleted"] == (1 if purge else 0)
+    assert states(app) == remaining
+
+
+def test_cli_reports_orphans(app, stripe_sessions):
+    add_draft(app, "legacy", None)
+    result = app.app.test_cli_runner().invoke(args=["tools", "reap-drafts", "--vacuum-pages", "0"])
+    assert result.exit_code == 0, result.output
+    assert "1 gardé(s) sans session Stripe" in result.output